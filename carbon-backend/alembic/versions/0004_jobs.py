@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004_jobs"
+down_revision = "0003_add_users_email_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("org_id", sa.BigInteger(), sa.ForeignKey("organizations.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("kind", sa.String(length=30), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="queued"),
+        sa.Column("params_json", sa.JSON(), nullable=True),
+        sa.Column("payload_path", sa.String(length=500), nullable=True),
+        sa.Column("result_json", sa.JSON(), nullable=True),
+        sa.Column("rows_processed", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("created_events", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("skipped_duplicates", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("rejected_rows", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("created_emissions", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_jobs_org_id", "jobs", ["org_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_org_id", table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0005_events_keyset_index"
+down_revision = "0004_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Serves the (occurred_at, id) keyset walk used by chunked recompute
+    op.create_index("ix_events_org_occurred_id", "activity_events", ["org_id", "occurred_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_org_occurred_id", table_name="activity_events")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0006_emission_rollups_daily"
+down_revision = "0005_events_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "emission_rollups_daily",
+        sa.Column("org_id", sa.BigInteger(), sa.ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("facility_id", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("category", sa.String(length=100), nullable=False),
+        sa.Column("scope", sa.String(length=5), nullable=False),
+        sa.Column("co2e_kg", sa.Numeric(18, 6), nullable=False, server_default="0"),
+        sa.Column("emissions_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("org_id", "day", "facility_id", "category", "scope", name="pk_emission_rollups_daily"),
+    )
+    # Backfill from existing emissions; afterwards the table is kept current by the calculator
+    op.execute(
+        """
+        INSERT INTO emission_rollups_daily (org_id, day, facility_id, category, scope, co2e_kg, emissions_count)
+        SELECT e.org_id, date(ev.occurred_at), coalesce(ev.facility_id, 0), ev.category, e.scope, sum(e.co2e_kg), count(*)
+        FROM emissions e
+        JOIN activity_events ev ON ev.id = e.event_id
+        GROUP BY e.org_id, date(ev.occurred_at), coalesce(ev.facility_id, 0), ev.category, e.scope
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("emission_rollups_daily")
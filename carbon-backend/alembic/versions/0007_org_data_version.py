@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0007_org_data_version"
+down_revision = "0006_emission_rollups_daily"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("organizations", sa.Column("data_version", sa.BigInteger(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    op.drop_column("organizations", "data_version")
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0008_emission_event_columns"
+down_revision = "0007_org_data_version"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_ROWS = 50_000
+
+
+def upgrade() -> None:
+    op.add_column("emissions", sa.Column("occurred_at", sa.DateTime(), nullable=True))
+    op.add_column("emissions", sa.Column("category", sa.String(length=100), nullable=True))
+    op.add_column("emissions", sa.Column("facility_id", sa.BigInteger(), sa.ForeignKey("facilities.id", ondelete="SET NULL"), nullable=True))
+
+    # Backfill in id ranges so a large table is not rewritten in one statement
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text("SELECT min(id), max(id) FROM emissions")).one()
+    if low is not None:
+        for start in range(low, high + 1, BACKFILL_BATCH_ROWS):
+            bind.execute(
+                sa.text(
+                    """
+                    UPDATE emissions
+                    SET occurred_at = ev.occurred_at, category = ev.category, facility_id = ev.facility_id
+                    FROM activity_events ev
+                    WHERE ev.id = emissions.event_id AND emissions.id >= :start AND emissions.id < :stop
+                    """
+                ),
+                {"start": start, "stop": start + BACKFILL_BATCH_ROWS},
+            )
+
+    op.alter_column("emissions", "occurred_at", nullable=False)
+    op.alter_column("emissions", "category", nullable=False)
+    op.create_index("ix_emissions_org_occurred", "emissions", ["org_id", "occurred_at"], unique=False)
+    op.create_index("ix_emissions_org_scope_occurred", "emissions", ["org_id", "scope", "occurred_at"], unique=False)
+    op.create_index("ix_emissions_org_category_occurred", "emissions", ["org_id", "category", "occurred_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_emissions_org_category_occurred", table_name="emissions")
+    op.drop_index("ix_emissions_org_scope_occurred", table_name="emissions")
+    op.drop_index("ix_emissions_org_occurred", table_name="emissions")
+    op.drop_column("emissions", "facility_id")
+    op.drop_column("emissions", "category")
+    op.drop_column("emissions", "occurred_at")
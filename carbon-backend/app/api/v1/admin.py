@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+
+from app.core.auth import CurrentUser, require_role
+from app.db.database import async_engine, engine
+from app.db.pool import pool_status
+
+router = APIRouter(prefix="/v1/admin", tags=["admin"])
+
+
+class WaitBucketOut(BaseModel):
+    le_ms: Optional[float]
+    count: int
+
+
+class CheckoutWaitOut(BaseModel):
+    count: int
+    sum_ms: float
+    buckets: list[WaitBucketOut]
+
+
+class PoolStatusOut(BaseModel):
+    pool_class: str
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout_seconds: Optional[float] = None
+    checked_out: Optional[int] = None
+    idle: Optional[int] = None
+    overflow: Optional[int] = None
+    connections_opened: Optional[int] = None
+    checkouts: Optional[int] = None
+    invalidations: Optional[int] = None
+    checkout_timeouts: Optional[int] = None
+    checkout_wait: Optional[CheckoutWaitOut] = None
+
+
+class DbPoolsOut(BaseModel):
+    sync_pool: PoolStatusOut
+    async_pool: PoolStatusOut
+
+
+@router.get("/db/pool", response_model=DbPoolsOut)
+def db_pool_stats(_: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
+    """Connection pool state of this process; checkout_wait buckets are cumulative."""
+    return DbPoolsOut(sync_pool=pool_status(engine), async_pool=pool_status(async_engine.sync_engine))
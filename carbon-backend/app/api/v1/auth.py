@@ -8,7 +8,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.security import hash_password, verify_password
-from app.core.auth import get_current_user
+from app.core.auth import CurrentUser, get_current_user, issue_access_token
 from app.db.database import get_db
 from app.db.models import Organization, User
 
@@ -23,6 +23,8 @@ class SignupRequest(BaseModel):
 
 class LoginSuccess(BaseModel):
     user_id: int
+    access_token: str
+    token_type: str = "bearer"
 
 
 class LoginRequest(BaseModel):
@@ -56,7 +58,7 @@ def signup(payload: SignupRequest, db: Session = Depends(get_db)):
     user = User(org_id=org.id, email=payload.email, password_hash=hash_password(payload.password), role="admin", is_active=True)
     db.add(user)
     db.flush()
-    return LoginSuccess(user_id=user.id)
+    return LoginSuccess(user_id=user.id, access_token=issue_access_token(user))
 
 
 @router.post("/login", response_model=LoginSuccess)
@@ -64,10 +66,11 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
     user = db.scalar(select(User).where(User.email == payload.email))
     if not user or not verify_password(payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    return LoginSuccess(user_id=user.id)
+    return LoginSuccess(user_id=user.id, access_token=issue_access_token(user))
 
 
 @router.get("/me", response_model=MeResponse)
-def me(current_user: Annotated[User, Depends(get_current_user)], db: Session = Depends(get_db)):
+def me(current_user: Annotated[CurrentUser, Depends(get_current_user)], db: Session = Depends(get_db)):
+    user = db.get(User, current_user.id)
     org = db.get(Organization, current_user.org_id)
-    return MeResponse(id=current_user.id, email=current_user.email, role=current_user.role, org={"id": org.id, "name": org.name, "plan": org.plan})
+    return MeResponse(id=user.id, email=user.email, role=user.role, org={"id": org.id, "name": org.name, "plan": org.plan})
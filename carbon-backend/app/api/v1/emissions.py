@@ -3,16 +3,19 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import require_role
-from app.db.database import get_db
-from app.db.models import ActivityEvent, Emission, User
-from app.services.calc.worker_stub import recalculate_for_events
-from app.utils.time import parse_dt
+from app.core.auth import CurrentUser, require_role
+from app.db.database import get_async_db, get_db
+from app.db.models import Emission, Job, JobStatusEnum
+from app.services.calc.recompute import JOB_KIND_RECOMPUTE, recompute_params
+from app.services.jobs.enqueue import enqueue_job
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.utils.time import naive_utc, parse_dt
 
 router = APIRouter(prefix="/v1/emissions", tags=["emissions"])
 
@@ -28,65 +31,140 @@ class EmissionOut(BaseModel):
 
 
 @router.get("", response_model=list[EmissionOut])
-def list_emissions(
-    db: Session = Depends(get_db),
-    user: Annotated[User, Depends(require_role("viewer", "analyst", "admin"))] = None,
+async def list_emissions(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user: Annotated[CurrentUser, Depends(require_role("viewer", "analyst", "admin"))] = None,
     from_: Optional[str] = Query(default=None, alias="from"),
     to: Optional[str] = Query(default=None),
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="Value of X-Next-Cursor from the previous page"),
 ):
-    # Filter by event occurred_at
+    # occurred_at is copied onto emissions, so this is a range scan on (org_id, occurred_at);
+    # id breaks ties so every row has a stable keyset position
     stmt = (
-        select(Emission, ActivityEvent)
-        .join(ActivityEvent, ActivityEvent.id == Emission.event_id)
+        select(Emission)
         .where(Emission.org_id == user.org_id)
-        .order_by(ActivityEvent.occurred_at.desc())
-        .limit(limit)
-        .offset(offset)
+        .order_by(Emission.occurred_at.desc(), Emission.id.desc())
+        .limit(limit + 1)
     )
+    if cursor:
+        if offset:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either cursor or offset, not both")
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        stmt = stmt.where(tuple_(Emission.occurred_at, Emission.id) < (naive_utc(after[0]), after[1]))
+    elif offset:
+        stmt = stmt.offset(offset)
+    # occurred_at is naive UTC; asyncpg refuses aware datetimes for timestamp without time zone
     if from_:
-        frm = parse_dt(from_)
-        stmt = stmt.where(ActivityEvent.occurred_at >= frm)
+        stmt = stmt.where(Emission.occurred_at >= naive_utc(parse_dt(from_)))
     if to:
-        to_dt = parse_dt(to)
-        stmt = stmt.where(ActivityEvent.occurred_at < to_dt)
-
-    rows = list(db.execute(stmt))
-    out: list[EmissionOut] = []
-    for em, ev in rows:
-        out.append(
-            EmissionOut(
-                id=em.id,
-                event_id=em.event_id,
-                factor_id=em.factor_id,
-                scope=em.scope,
-                co2e_kg=float(em.co2e_kg),
-                occurred_at=ev.occurred_at,
-                category=ev.category,
-            )
+        stmt = stmt.where(Emission.occurred_at < naive_utc(parse_dt(to)))
+
+    rows = list((await db.scalars(stmt)).all())
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].occurred_at, rows[-1].id)
+    return [
+        EmissionOut(
+            id=em.id,
+            event_id=em.event_id,
+            factor_id=em.factor_id,
+            scope=em.scope,
+            co2e_kg=float(em.co2e_kg),
+            occurred_at=em.occurred_at,
+            category=em.category,
         )
-    return out
+        for em in rows
+    ]
 
 
 class RecomputeRequest(BaseModel):
     since: Optional[str] = Field(default=None)
     until: Optional[str] = Field(default=None)
+    chunk_size: Optional[int] = Field(default=None, ge=1, le=100_000)
 
 
 class RecomputeResponse(BaseModel):
+    # As before jobs: emissions recomputed (events that matched a factor), so far. It stays 0 until a
+    # worker picks the job up and is final once status is "succeeded".
     recalculated_events: int
+    job_id: int
+    status: str
+    # Events walked so far, including those without a matching factor
+    events_processed: int = 0
+    total_events: Optional[int] = None
+    created_emissions: int = 0
+    changed_emissions: int = 0
+    unchanged_emissions: int = 0
+    removed_emissions: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+def recompute_out(job: Job) -> RecomputeResponse:
+    result = job.result_json or {}
+    return RecomputeResponse(
+        recalculated_events=int(job.created_emissions) + result.get("changed_emissions", 0) + result.get("unchanged_emissions", 0),
+        job_id=job.id,
+        status=job.status,
+        events_processed=int(job.rows_processed),
+        total_events=result.get("total_events"),
+        created_emissions=int(job.created_emissions),
+        changed_emissions=result.get("changed_emissions", 0),
+        unchanged_emissions=result.get("unchanged_emissions", 0),
+        removed_emissions=result.get("removed_emissions", 0),
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _get_recompute_job(db: Session, *, job_id: int, org_id: int) -> Job:
+    job = db.get(Job, job_id)
+    if not job or job.org_id != org_id or job.kind != JOB_KIND_RECOMPUTE:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+def _dispatch(db: Session, job: Job) -> RecomputeResponse:
+    # The worker reads the job with its own session, so it must be committed before dispatch
+    db.commit()
+    enqueue_job(job.id)
+    db.refresh(job)
+    return recompute_out(job)
+
+
+@router.post("/recompute", response_model=RecomputeResponse, status_code=status.HTTP_202_ACCEPTED)
+def recompute(payload: RecomputeRequest, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
+    try:
+        since_dt = parse_dt(payload.since) if payload.since else None
+        until_dt = parse_dt(payload.until) if payload.until else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since/until must be ISO-8601 datetimes")
+    job = Job(org_id=user.org_id, kind=JOB_KIND_RECOMPUTE, params_json=recompute_params(since=since_dt, until=until_dt, chunk_size=payload.chunk_size))
+    db.add(job)
+    return _dispatch(db, job)
+
+
+@router.get("/recompute/jobs/{job_id}", response_model=RecomputeResponse)
+def get_recompute_job(job_id: int, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
+    return recompute_out(_get_recompute_job(db, job_id=job_id, org_id=user.org_id))
 
 
-@router.post("/recompute", response_model=RecomputeResponse, dependencies=[Depends(require_role("admin"))])
-def recompute(payload: RecomputeRequest, db: Session = Depends(get_db), user: Annotated[User, Depends(require_role("admin"))] = None):
-    stmt = select(ActivityEvent.id).where(ActivityEvent.org_id == user.org_id)
-    if payload.since:
-        since_dt = parse_dt(payload.since)
-        stmt = stmt.where(ActivityEvent.occurred_at >= since_dt)
-    if payload.until:
-        until_dt = parse_dt(payload.until)
-        stmt = stmt.where(ActivityEvent.occurred_at < until_dt)
-    event_ids = list(db.scalars(stmt))
-    count = recalculate_for_events(db, org_id=user.org_id, event_ids=list(event_ids))
-    return RecomputeResponse(recalculated_events=count)
+@router.post("/recompute/jobs/{job_id}/resume", response_model=RecomputeResponse, status_code=status.HTTP_202_ACCEPTED)
+def resume_recompute_job(job_id: int, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
+    job = _get_recompute_job(db, job_id=job_id, org_id=user.org_id)
+    if job.status != JobStatusEnum.failed:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}; only failed jobs can be resumed")
+    # Continues from the stored checkpoint rather than starting over
+    job.status = JobStatusEnum.queued
+    job.finished_at = None
+    return _dispatch(db, job)
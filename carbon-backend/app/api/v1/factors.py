@@ -7,13 +7,17 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
 from sqlalchemy import and_, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import require_role
-from app.db.database import get_db
-from app.db.models import EmissionFactor, User
+from app.core.auth import CurrentUser, require_role
+from app.db.database import get_async_db, get_db
+from app.db.models import EmissionFactor, Job
+from app.services.calc.factor_cache import factor_cache, invalidate_factor_cache_on_commit
+from app.services.calc.recompute import JOB_KIND_FACTOR_RECOMPUTE
 from app.services.calc.worker_stub import select_best_factor
-from app.utils.time import parse_dt
+from app.services.jobs.enqueue import enqueue_job
+from app.utils.time import naive_utc, parse_dt
 
 router = APIRouter(prefix="/v1/factors", tags=["factors"])
 
@@ -49,8 +53,13 @@ class FactorOut(BaseModel):
     version: int
 
 
-@router.post("", response_model=FactorOut, status_code=201, dependencies=[Depends(require_role("admin"))])
-def create_factor(payload: FactorCreate, db: Session = Depends(get_db), user: Annotated[User, Depends(require_role("admin"))] = None):
+class FactorCreateOut(FactorOut):
+    # Background job recomputing the emissions this factor now wins resolution for
+    recompute_job_id: int
+
+
+@router.post("", response_model=FactorCreateOut, status_code=201)
+def create_factor(payload: FactorCreate, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
     vf = parse_dt(payload.valid_from)
     vt = parse_dt(payload.valid_to)
     if vt <= vf:
@@ -74,7 +83,13 @@ def create_factor(payload: FactorCreate, db: Session = Depends(get_db), user: An
         db.flush()
     except IntegrityError:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Factor already exists for given keys")
-    return FactorOut(
+    invalidate_factor_cache_on_commit(db, category=row.category)
+    job = Job(org_id=None, kind=JOB_KIND_FACTOR_RECOMPUTE, params_json={"factor_id": row.id})
+    db.add(job)
+    # The worker must see both the factor and the job, so commit before dispatch
+    db.commit()
+    enqueue_job(job.id)
+    return FactorCreateOut(
         id=row.id,
         namespace=row.namespace,
         category=row.category,
@@ -88,13 +103,14 @@ def create_factor(payload: FactorCreate, db: Session = Depends(get_db), user: An
         valid_from=row.valid_from,
         valid_to=row.valid_to,
         version=int(row.version),
+        recompute_job_id=job.id,
     )
 
 
 @router.get("", response_model=list[FactorOut])
-def list_factors(
-    db: Session = Depends(get_db),
-    _: Annotated[User, Depends(require_role("viewer", "analyst", "admin"))] = None,
+async def list_factors(
+    db: AsyncSession = Depends(get_async_db),
+    _: Annotated[CurrentUser, Depends(require_role("viewer", "analyst", "admin"))] = None,
     category: Optional[str] = Query(default=None),
     geography: Optional[str] = Query(default=None),
     valid_on: Optional[str] = Query(default=None),
@@ -106,12 +122,12 @@ def list_factors(
     if geography:
         conditions.append(EmissionFactor.geography == geography)
     if valid_on:
-        ts = parse_dt(valid_on)
+        ts = naive_utc(parse_dt(valid_on))
         conditions.append(and_(EmissionFactor.valid_from <= ts, EmissionFactor.valid_to >= ts))
     if conditions:
         stmt = stmt.where(and_(*conditions))
     stmt = stmt.order_by(EmissionFactor.category, EmissionFactor.geography, EmissionFactor.version.desc())
-    rows = list(db.scalars(stmt))
+    rows = (await db.scalars(stmt)).all()
     return [
         FactorOut(
             id=r.id,
@@ -147,9 +163,65 @@ class PreviewOut(BaseModel):
 
 
 @router.get("/preview", response_model=PreviewOut)
-def preview(category: str, occurred_at: str, geography: Optional[str] = None, db: Session = Depends(get_db), _: Annotated[User, Depends(require_role("viewer", "analyst", "admin"))] = None):
+def preview(category: str, occurred_at: str, geography: Optional[str] = None, db: Session = Depends(get_db), _: Annotated[CurrentUser, Depends(require_role("viewer", "analyst", "admin"))] = None):
     ts = parse_dt(occurred_at)
     fac = select_best_factor(db, category=category, occurred_at=ts, geography=geography)
     if not fac:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No factor matches criteria")
     return PreviewOut(id=fac.id, category=fac.category, geography=fac.geography, version=int(fac.version), factor_value=float(fac.factor_value))
+
+
+class FactorCacheStatsOut(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+@router.get("/cache/stats", response_model=FactorCacheStatsOut)
+def factor_cache_stats(_: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
+    return FactorCacheStatsOut(**factor_cache.stats())
+
+
+class FactorJobOut(BaseModel):
+    id: int
+    factor_id: int
+    status: str
+    scanned_events: int
+    affected_events: int
+    created_emissions: int
+    changed_emissions: int
+    unchanged_emissions: int
+    removed_emissions: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+@router.get("/jobs/{job_id}", response_model=FactorJobOut)
+def get_factor_job(job_id: int, db: Session = Depends(get_db), _: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
+    job = db.get(Job, job_id)
+    if not job or job.kind != JOB_KIND_FACTOR_RECOMPUTE:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    result = job.result_json or {}
+    return FactorJobOut(
+        id=job.id,
+        factor_id=job.params_json["factor_id"],
+        status=job.status,
+        scanned_events=int(job.rows_processed),
+        affected_events=result.get("affected_events", 0),
+        created_emissions=int(job.created_emissions),
+        changed_emissions=result.get("changed_emissions", 0),
+        unchanged_emissions=result.get("unchanged_emissions", 0),
+        removed_emissions=result.get("removed_emissions", 0),
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.api.v1.ingest import IngestRequest
+from app.api.v1.ingest_upload import RowRejectionOut
+from app.core.auth import CurrentUser, require_role
+from app.core.config import settings
+from app.db.database import get_db
+from app.db.models import Job, JobStatusEnum
+from app.services.ingestion.jobs import JOB_KIND_INGEST_CSV, JOB_KIND_INGEST_EVENTS
+from app.services.jobs.enqueue import enqueue_job
+
+router = APIRouter(prefix="/v1/ingest/jobs", tags=["ingest"])
+
+UPLOAD_COPY_BUFFER_BYTES = 1024 * 1024
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    rows_processed: int
+    created_events: int
+    skipped_duplicates: int
+    rejected_rows: int
+    created_emissions: int
+    rejections: list[RowRejectionOut] = []
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+def job_out(job: Job) -> JobOut:
+    return JobOut(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        rows_processed=int(job.rows_processed),
+        created_events=int(job.created_events),
+        skipped_duplicates=int(job.skipped_duplicates),
+        rejected_rows=int(job.rejected_rows),
+        created_emissions=int(job.created_emissions),
+        rejections=[RowRejectionOut(**r) for r in (job.result_json or {}).get("rejections", [])],
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _submit(db: Session, job: Job) -> JobOut:
+    db.add(job)
+    # The worker reads the job with its own session, so it must be committed before dispatch
+    db.commit()
+    enqueue_job(job.id)
+    db.refresh(job)
+    return job_out(job)
+
+
+@router.post("/events", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def submit_events_job(payload: IngestRequest, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("analyst", "admin"))] = None):
+    if not payload.events:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No events provided")
+    job = Job(org_id=user.org_id, kind=JOB_KIND_INGEST_EVENTS, params_json={"events": [ev.model_dump() for ev in payload.events]})
+    return _submit(db, job)
+
+
+@router.post("/upload-csv", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def submit_csv_job(file: UploadFile = File(...), db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("analyst", "admin"))] = None):
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only CSV files are accepted")
+    os.makedirs(settings.ingest_job_dir, exist_ok=True)
+    path = os.path.join(settings.ingest_job_dir, f"{uuid.uuid4().hex}.csv")
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file.file, out, UPLOAD_COPY_BUFFER_BYTES)
+    job = Job(org_id=user.org_id, kind=JOB_KIND_INGEST_CSV, payload_path=path, params_json={"filename": file.filename})
+    return _submit(db, job)
+
+
+def _get_ingest_job(db: Session, *, job_id: int, org_id: int) -> Job:
+    job = db.get(Job, job_id)
+    if not job or job.org_id != org_id or job.kind not in (JOB_KIND_INGEST_EVENTS, JOB_KIND_INGEST_CSV):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(job_id: int, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("viewer", "analyst", "admin"))] = None):
+    return job_out(_get_ingest_job(db, job_id=job_id, org_id=user.org_id))
+
+
+@router.post("/{job_id}/resume", response_model=JobOut, status_code=status.HTTP_202_ACCEPTED)
+def resume_job(job_id: int, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("analyst", "admin"))] = None):
+    job = _get_ingest_job(db, job_id=job_id, org_id=user.org_id)
+    if job.status != JobStatusEnum.failed:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}; only failed jobs can be resumed")
+    if job.kind == JOB_KIND_INGEST_CSV and not os.path.exists(job.payload_path):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Uploaded file is no longer available; upload it again")
+    # Continues from rows_processed rather than starting over
+    job.status = JobStatusEnum.queued
+    job.finished_at = None
+    return _submit(db, job)
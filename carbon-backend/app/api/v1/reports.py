@@ -2,71 +2,177 @@ from __future__ import annotations
 
 import csv
 from io import StringIO
-from typing import Annotated
+from typing import Annotated, Iterator, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy import select
+from sqlalchemy import Result, select
 from sqlalchemy.orm import Session
 
-from app.core.auth import require_role
+from app.core.auth import CurrentUser, require_role
+from app.core.config import settings
 from app.db.database import get_db
-from app.db.models import ActivityEvent, Emission, User
-from app.utils.time import parse_dt
+from app.db.models import ActivityEvent, Emission
+from app.utils.time import naive_utc, parse_dt
 
 router = APIRouter(prefix="/v1/reports", tags=["reports"])
 
+REPORT_COLUMNS = [
+    "emission_id",
+    "event_id",
+    "occurred_at",
+    "category",
+    "unit",
+    "value_numeric",
+    "scope",
+    "co2e_kg",
+]
 
-def stream_csv(rows):
+
+def report_rows(db: Session, *, org_id: int, start, end) -> Result:
+    # Plain column tuples in REPORT_COLUMNS order; yield_per streams them from a server-side cursor
+    # so memory stays flat however many emissions the period holds
+    stmt = (
+        select(
+            Emission.id,
+            Emission.event_id,
+            Emission.occurred_at,
+            Emission.category,
+            ActivityEvent.unit,
+            ActivityEvent.value_numeric,
+            Emission.scope,
+            Emission.co2e_kg,
+        )
+        .join(ActivityEvent, ActivityEvent.id == Emission.event_id)
+        .where(Emission.org_id == org_id)
+        .where(Emission.occurred_at >= naive_utc(start))
+        .where(Emission.occurred_at < naive_utc(end))
+        .order_by(Emission.occurred_at)
+        .execution_options(yield_per=settings.report_fetch_rows)
+    )
+    return db.execute(stmt)
+
+
+def stream_csv(rows: Result) -> Iterator[str]:
     buffer = StringIO()
     writer = csv.writer(buffer)
-    writer.writerow([
-        "emission_id",
-        "event_id",
-        "occurred_at",
-        "category",
-        "unit",
-        "value_numeric",
-        "scope",
-        "co2e_kg",
-    ])
+    writer.writerow(REPORT_COLUMNS)
+    pending = 0
+    for batch in rows.partitions():
+        for emission_id, event_id, occurred_at, category, unit, value_numeric, scope, co2e_kg in batch:
+            writer.writerow([
+                emission_id,
+                event_id,
+                occurred_at.isoformat(),
+                category,
+                unit,
+                float(value_numeric),
+                scope,
+                float(co2e_kg),
+            ])
+            pending += 1
+            # One chunk per flush instead of per row keeps the number of ASGI sends small
+            if pending >= settings.report_flush_rows or buffer.tell() >= settings.report_flush_bytes:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
     yield buffer.getvalue()
-    buffer.seek(0)
-    buffer.truncate(0)
-    for em, ev in rows:
-        writer.writerow([
-            em.id,
-            ev.id,
-            ev.occurred_at.isoformat(),
-            ev.category,
-            ev.unit,
-            float(ev.value_numeric),
-            em.scope,
-            float(em.co2e_kg),
-        ])
-        yield buffer.getvalue()
-        buffer.seek(0)
-        buffer.truncate(0)
+
+
+class _ChunkSink:
+    # Write-only file for pyarrow writers: collects bytes until drained, while tell() keeps counting
+    # from the start of the file so Parquet footer offsets stay correct
+    closed = False
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_columnar(rows: Result, *, fmt: Literal["parquet", "arrow"]) -> Iterator[bytes]:
+    # pyarrow is only needed for these exports, so keep it out of app startup
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    labels = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema([
+        ("emission_id", pa.int64()),
+        ("event_id", pa.int64()),
+        ("occurred_at", pa.timestamp("us", tz="UTC")),
+        ("category", labels),
+        ("unit", labels),
+        ("value_numeric", pa.float64()),
+        ("scope", labels),
+        ("co2e_kg", pa.float64()),
+    ])
+    sink = _ChunkSink()
+    file = pa.PythonFile(sink, mode="w")
+    writer = pq.ParquetWriter(file, schema) if fmt == "parquet" else pa.ipc.new_stream(file, schema)
+    # One fetched partition becomes one record batch / row group, sent as soon as it is encoded
+    for batch in rows.partitions():
+        emission_id, event_id, occurred_at, category, unit, value_numeric, scope, co2e_kg = zip(*batch)
+        columns = [
+            emission_id,
+            event_id,
+            occurred_at,
+            category,
+            unit,
+            [float(v) for v in value_numeric],
+            scope,
+            [float(v) for v in co2e_kg],
+        ]
+        writer.write_batch(pa.RecordBatch.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+REPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
 
 
 @router.get("/period")
-def report_period(from_: str = Query(alias="from"), to: str = Query(), db: Session = Depends(get_db), user: Annotated[User, Depends(require_role("viewer", "analyst", "admin"))] = None):
+def report_period(
+    from_: str = Query(alias="from"),
+    to: str = Query(),
+    format: Literal["csv", "parquet", "arrow"] = Query(default="csv"),
+    db: Session = Depends(get_db),
+    user: Annotated[CurrentUser, Depends(require_role("viewer", "analyst", "admin"))] = None,
+):
     start = parse_dt(from_)
     end = parse_dt(to)
     if end <= start:
         raise HTTPException(status_code=400, detail="to must be after from")
 
-    stmt = (
-        select(Emission, ActivityEvent)
-        .join(ActivityEvent, ActivityEvent.id == Emission.event_id)
-        .where(Emission.org_id == user.org_id)
-        .where(ActivityEvent.occurred_at >= start)
-        .where(ActivityEvent.occurred_at < end)
-        .order_by(ActivityEvent.occurred_at)
-    )
-    rows = db.execute(stmt)
+    rows = report_rows(db, org_id=user.org_id, start=start, end=end)
 
+    media_type, extension = REPORT_FORMATS[format]
     headers = {
-        "Content-Disposition": f"attachment; filename=emissions_{start.date()}_{end.date()}.csv"
+        "Content-Disposition": f"attachment; filename=emissions_{start.date()}_{end.date()}.{extension}"
     }
-    return StreamingResponse(stream_csv(rows), media_type="text/csv", headers=headers)
+    body = stream_csv(rows) if format == "csv" else stream_columnar(rows, fmt=format)
+    return StreamingResponse(body, media_type=media_type, headers=headers)
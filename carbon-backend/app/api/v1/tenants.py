@@ -8,10 +8,11 @@ from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.core.auth import require_role
+from app.core.auth import CurrentUser, require_role
 from app.core.security import hash_password
 from app.db.database import get_db
 from app.db.models import Facility, User
+from app.services.analytics.watermark import mark_org_data_changed
 
 router = APIRouter(prefix="/v1/tenants", tags=["tenants"])
 
@@ -29,19 +30,21 @@ class FacilityOut(BaseModel):
     grid_region: Optional[str]
 
 
-@router.post("/facilities", response_model=FacilityOut, status_code=201, dependencies=[Depends(require_role("admin"))])
-def create_facility(payload: FacilityCreate, db: Session = Depends(get_db), user: Annotated[User, Depends(require_role("admin"))] = None):
+@router.post("/facilities", response_model=FacilityOut, status_code=201)
+def create_facility(payload: FacilityCreate, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
     facility = Facility(org_id=user.org_id, name=payload.name, country=payload.country, grid_region=payload.grid_region)
     db.add(facility)
     try:
         db.flush()
     except IntegrityError:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Facility name already exists")
+    # facilities_count is part of the cached analytics summary
+    mark_org_data_changed(db, org_id=user.org_id)
     return FacilityOut(id=facility.id, name=facility.name, country=facility.country, grid_region=facility.grid_region)
 
 
 @router.get("/facilities", response_model=list[FacilityOut])
-def list_facilities(db: Session = Depends(get_db), user: Annotated[User, Depends(require_role("viewer", "analyst", "admin"))] = None):
+def list_facilities(db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("viewer", "analyst", "admin"))] = None):
     rows = list(db.scalars(select(Facility).where(Facility.org_id == user.org_id).order_by(Facility.name)))
     return [FacilityOut(id=f.id, name=f.name, country=f.country, grid_region=f.grid_region) for f in rows]
 
@@ -59,8 +62,8 @@ class UserOut(BaseModel):
     is_active: bool
 
 
-@router.post("/users", response_model=UserOut, status_code=201, dependencies=[Depends(require_role("admin"))])
-def create_user(payload: UserCreate, db: Session = Depends(get_db), user: Annotated[User, Depends(require_role("admin"))] = None):
+@router.post("/users", response_model=UserOut, status_code=201)
+def create_user(payload: UserCreate, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
     new_user = User(org_id=user.org_id, email=payload.email, password_hash=hash_password(payload.password), role=payload.role, is_active=True)
     db.add(new_user)
     try:
@@ -70,7 +73,26 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db), user: Annota
     return UserOut(id=new_user.id, email=new_user.email, role=new_user.role, is_active=new_user.is_active)
 
 
-@router.get("/users", response_model=list[UserOut], dependencies=[Depends(require_role("admin"))])
-def list_users(db: Session = Depends(get_db), user: Annotated[User, Depends(require_role("admin"))] = None):
+@router.get("/users", response_model=list[UserOut])
+def list_users(db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
     rows = list(db.scalars(select(User).where(User.org_id == user.org_id).order_by(User.email)))
     return [UserOut(id=u.id, email=u.email, role=u.role, is_active=u.is_active) for u in rows]
+
+
+class UserUpdate(BaseModel):
+    role: Optional[str] = Field(default=None, pattern="^(admin|analyst|viewer)$")
+    is_active: Optional[bool] = None
+
+
+@router.patch("/users/{user_id}", response_model=UserOut)
+def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db), user: Annotated[CurrentUser, Depends(require_role("admin"))] = None):
+    # Changing role or is_active bumps auth_version on flush, revoking the user's outstanding tokens
+    target = db.get(User, user_id)
+    if not target or target.org_id != user.org_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if payload.role is not None:
+        target.role = payload.role
+    if payload.is_active is not None:
+        target.is_active = payload.is_active
+    db.flush()
+    return UserOut(id=target.id, email=target.email, role=target.role, is_active=target.is_active)
@@ -1,25 +1,117 @@
 from __future__ import annotations
 
-from typing import Annotated
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Annotated, Optional
 
 from fastapi import Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import create_access_token, decode_token
+from app.db.database import get_async_db
 from app.db.models import User
 
-def get_current_user(user_id: Annotated[int, Query(alias="user_id")], db: Annotated[Session, Depends(get_db)]) -> User:
-    user = db.get(User, user_id)
-    if not user:
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# user_id -> auth_version of the user, or REVOKED once the user is deactivated or deleted. Tokens carry
+# the version they were issued at, so bumping users.auth_version (or deactivating the user) revokes
+# them without a per-request user lookup: at once in the process that commits the change, and within
+# AUTH_VERSION_TTL_SECONDS in every other process.
+auth_versions = TTLCache(maxsize=settings.auth_version_cache_max_entries, ttl_seconds=settings.auth_version_ttl_seconds)
+REVOKED = -1
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    org_id: int
+    role: str
+
+
+def issue_access_token(user: User) -> str:
+    return create_access_token(str(user.id), {"org_id": user.org_id, "role": user.role, "ver": user.auth_version})
+
+
+async def current_auth_version(db: AsyncSession, user_id: int) -> int:
+    version = auth_versions.get(user_id)
+    if version is None:
+        row = (await db.execute(select(User.auth_version, User.is_active).where(User.id == user_id))).first()
+        version = row.auth_version if row and row.is_active else REVOKED
+        auth_versions.set(user_id, version)
+    return version
+
+
+def _user_from_token(token: str) -> Optional[tuple[CurrentUser, int]]:
+    try:
+        claims = decode_token(token)
+        return CurrentUser(id=int(claims["sub"]), org_id=int(claims["org_id"]), role=str(claims["role"])), int(claims["ver"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+async def get_current_user(
+    credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(bearer_scheme)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    # Not named user_id: routes with a {user_id} path parameter would claim it
+    legacy_user_id: Annotated[Optional[int], Query(alias="user_id")] = None,
+) -> CurrentUser:
+    if credentials is not None:
+        issued = _user_from_token(credentials.credentials)
+        if issued is None:
+            raise _unauthorized("Invalid or expired token")
+        user, version = issued
+        if await current_auth_version(db, user.id) != version:
+            raise _unauthorized("Token revoked")
+        return user
+    if not settings.auth_allow_legacy_user_id or legacy_user_id is None:
+        raise _unauthorized("Not authenticated")
+    row = await db.get(User, legacy_user_id)
+    if not row:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user id")
-    if not user.is_active:
+    if not row.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user")
-    return user
+    return CurrentUser(id=row.id, org_id=row.org_id, role=row.role)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_auth_version(session: Session, flush_context, instances) -> None:
+    # Tokens carry the role and were issued to an active user, so changing either revokes them.
+    # ORM changes only: bulk UPDATE statements on users must bump auth_version themselves.
+    for obj in session.dirty:
+        if isinstance(obj, User) and any(inspect(obj).attrs[name].history.has_changes() for name in ("role", "is_active")):
+            obj.auth_version = User.auth_version + 1
+            session.info.setdefault("auth_revoked", set()).add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            session.info.setdefault("auth_revoked", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_auth_versions(session: Session) -> None:
+    revoked = session.info.pop("auth_revoked", None)
+    if revoked:
+        auth_versions.invalidate(lambda user_id: user_id in revoked)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_auth_revocations(session: Session) -> None:
+    session.info.pop("auth_revoked", None)
 
 
+@lru_cache(maxsize=None)
 def require_role(*roles: str):
-    def checker(user: Annotated[User, Depends(get_current_user)]) -> User:
+    # One checker per role set: FastAPI resolves a dependency once per request per callable.
+    # Async so authorization never takes a threadpool worker, even for sync routes.
+    async def checker(user: Annotated[CurrentUser, Depends(get_current_user)]) -> CurrentUser:
         if roles and user.role not in roles:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role")
         return user
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from celery import Celery
+
+from app.core.config import settings
+
+celery_app = Celery("carbon", broker=settings.celery_broker_url, include=["app.services.jobs.tasks"])
+celery_app.conf.update(
+    task_always_eager=settings.celery_task_always_eager,
+    task_eager_propagates=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    task_ignore_result=True,
+)
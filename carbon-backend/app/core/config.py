@@ -6,10 +6,57 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
 
     database_url: str = Field(..., alias="DATABASE_URL")
+    # Defaults to DATABASE_URL with the asyncpg/aiosqlite driver; set it when driver query options differ
+    async_database_url: str | None = Field(None, alias="ASYNC_DATABASE_URL")
+    # Applied to the sync and the async engine separately, so a process can hold up to twice
+    # (pool_size + max_overflow) connections
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(30, alias="DB_POOL_TIMEOUT_SECONDS")
+    # -1 keeps connections indefinitely; set below the server/proxy idle timeout otherwise
+    db_pool_recycle_seconds: int = Field(-1, alias="DB_POOL_RECYCLE_SECONDS")
+    # Pings each connection on checkout; costs a round trip per checkout but hides dropped connections
+    db_pool_pre_ping: bool = Field(True, alias="DB_POOL_PRE_PING")
+    # Statements slower than this are logged with their request id, route and bind shapes (0 disables)
+    slow_query_ms: float = Field(200, alias="SLOW_QUERY_MS")
+    # A request running one statement template more often than this is logged as a likely N+1 (0 disables)
+    n_plus_one_threshold: int = Field(20, alias="N_PLUS_ONE_THRESHOLD")
     jwt_secret: str = Field("change-me", alias="JWT_SECRET")
     jwt_algorithm: str = Field("HS256", alias="JWT_ALGORITHM")
     jwt_expires_minutes: int = Field(60 * 24, alias="JWT_EXPIRES_MINUTES")
+    # How long a user's token version / deactivation is trusted before it is re-read from the database
+    auth_version_ttl_seconds: float = Field(60, alias="AUTH_VERSION_TTL_SECONDS")
+    auth_version_cache_max_entries: int = Field(10_000, alias="AUTH_VERSION_CACHE_MAX_ENTRIES")
+    # Accept ?user_id= from requests without an Authorization header. Unauthenticated: anyone can act as
+    # any user, so only enable it while migrating old clients on a trusted network.
+    auth_allow_legacy_user_id: bool = Field(False, alias="AUTH_ALLOW_LEGACY_USER_ID")
     environment: str = Field("local", alias="ENVIRONMENT")
+    ingest_csv_chunk_rows: int = Field(10_000, alias="INGEST_CSV_CHUNK_ROWS")
+    ingest_max_rejections_reported: int = Field(1000, alias="INGEST_MAX_REJECTIONS_REPORTED")
+    # Uploaded CSVs for background jobs are spooled here; must be shared storage when workers run on other hosts
+    ingest_job_dir: str = Field("/tmp/carbon-ingest-jobs", alias="INGEST_JOB_DIR")
+    celery_broker_url: str = Field("redis://localhost:6379/0", alias="CELERY_BROKER_URL")
+    # Run jobs in-process inside the request (tests / single-node setups without a broker)
+    celery_task_always_eager: bool = Field(False, alias="CELERY_TASK_ALWAYS_EAGER")
+    factor_cache_max_entries: int = Field(4096, alias="FACTOR_CACHE_MAX_ENTRIES")
+    factor_cache_ttl_seconds: float = Field(300, alias="FACTOR_CACHE_TTL_SECONDS")
+    factor_cache_bucket_days: int = Field(30, alias="FACTOR_CACHE_BUCKET_DAYS")
+    recompute_chunk_size: int = Field(5000, alias="RECOMPUTE_CHUNK_SIZE")
+    analytics_cache_max_entries: int = Field(2048, alias="ANALYTICS_CACHE_MAX_ENTRIES")
+    analytics_cache_ttl_seconds: float = Field(300, alias="ANALYTICS_CACHE_TTL_SECONDS")
+    # Bounds how long another process's commit can go unnoticed by this process's analytics cache
+    analytics_watermark_ttl_seconds: float = Field(2, alias="ANALYTICS_WATERMARK_TTL_SECONDS")
+    # Rows fetched per round trip from the server-side cursor behind report exports
+    report_fetch_rows: int = Field(5000, alias="REPORT_FETCH_ROWS")
+    # CSV output is sent once either threshold is reached
+    report_flush_rows: int = Field(1000, alias="REPORT_FLUSH_ROWS")
+    report_flush_bytes: int = Field(64 * 1024, alias="REPORT_FLUSH_BYTES")
+    # "openai" or "fake" (deterministic offline stub for local runs and tests)
+    suggestions_llm_provider: str = Field("openai", alias="SUGGESTIONS_LLM_PROVIDER")
+    suggestions_llm_model: str = Field("gpt-4o", alias="SUGGESTIONS_LLM_MODEL")
+    suggestions_timeout_seconds: float = Field(30, alias="SUGGESTIONS_TIMEOUT_SECONDS")
+    suggestions_cache_max_entries: int = Field(1024, alias="SUGGESTIONS_CACHE_MAX_ENTRIES")
+    suggestions_cache_ttl_seconds: float = Field(24 * 3600, alias="SUGGESTIONS_CACHE_TTL_SECONDS")
 
 
 settings = Settings()
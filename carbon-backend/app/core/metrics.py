@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Sequence
+
+# Upper bounds in seconds, 1 ms .. 10 s
+LATENCY_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram; snapshots report cumulative counts like Prometheus `le` buckets."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, running = [], 0
+        for bound, n in zip((*self.buckets, float("inf")), counts):
+            running += n
+            cumulative.append((bound, running))
+        return {"buckets": cumulative, "count": running, "sum": total}
+
+
+# Query counts per request, for the per-route query histograms
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class HistogramFamily:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help, tuple(labelnames), tuple(buckets)
+        self._children: dict[tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            snap = child.snapshot()
+            for bound, count in snap["buckets"]:
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(snap['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {snap['count']}")
+        return lines
+
+
+class GaugeFamily:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, values: tuple[str, ...], amount: float) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, values)} {_number(v)}" for values, v in items]
+        return lines
+
+
+REQUEST_LATENCY = HistogramFamily("http_request_duration_seconds", "Request latency by route template and status.", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = GaugeFamily("http_requests_in_flight", "Requests currently being handled.", ("method",))
+REQUEST_DB_QUERIES = HistogramFamily("http_request_db_queries", "SQL statements executed per request.", ("method", "route"), COUNT_BUCKETS)
+REQUEST_DB_TIME = HistogramFamily("http_request_db_seconds", "Time spent executing SQL per request.", ("method", "route"))
+
+FAMILIES = (REQUEST_LATENCY, REQUESTS_IN_FLIGHT, REQUEST_DB_QUERIES, REQUEST_DB_TIME)
+
+
+def render_prometheus() -> str:
+    lines: list[str] = []
+    for family in FAMILIES:
+        lines += family.render()
+    return "\n".join(lines) + "\n"
@@ -4,14 +4,30 @@ from typing import Callable
 
 from fastapi import Request, Response
 
+from app.core.metrics import REQUEST_DB_QUERIES, REQUEST_DB_TIME, REQUEST_LATENCY, REQUESTS_IN_FLIGHT
+from app.core.sql_instrumentation import RequestContext, current_request, report_repeated_statements
+
 
 async def request_context_middleware(request: Request, call_next: Callable):
     start = time.perf_counter()
     request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+    ctx = RequestContext(request_id=request_id, method=request.method, scope=request.scope)
+    token = current_request.set(ctx)
+    # By method only: the route is not known until the router has matched the request
+    REQUESTS_IN_FLIGHT.add((ctx.method,), 1)
+    status_code = 500
     try:
         response: Response = await call_next(request)
+        status_code = response.status_code
     finally:
-        duration_ms = int((time.perf_counter() - start) * 1000)
+        elapsed = time.perf_counter() - start
+        duration_ms = int(elapsed * 1000)
+        REQUESTS_IN_FLIGHT.add((ctx.method,), -1)
+        REQUEST_LATENCY.labels(ctx.method, ctx.route, str(status_code)).observe(elapsed)
+        REQUEST_DB_QUERIES.labels(ctx.method, ctx.route).observe(ctx.queries)
+        REQUEST_DB_TIME.labels(ctx.method, ctx.route).observe(ctx.db_seconds)
+        report_repeated_statements(ctx)
+        current_request.reset(token)
     response.headers["X-Request-ID"] = request_id
     response.headers["X-Process-Time-ms"] = str(duration_ms)
     return response
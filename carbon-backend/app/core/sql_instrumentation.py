@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# "(?, ?, ?)" / "(%(id_1)s, %(id_2)s)" / "($1, $2)": expanded IN lists differ only in length
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+))+\s*\)")
+
+
+@dataclass
+class RequestContext:
+    request_id: str
+    method: str
+    scope: dict
+    queries: int = 0
+    db_seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    @property
+    def route(self) -> str:
+        # The router records the matched route in the (shared) scope once it has matched one; label by
+        # its path template rather than the raw path so ids in URLs don't create a series per value
+        return getattr(self.scope.get("route"), "path", None) or "unmatched"
+
+
+# Set for the duration of each HTTP request. The SQL hooks below add to it from whichever thread or
+# task runs the statement: the threadpool and AsyncSession greenlets both inherit the request's context.
+current_request: ContextVar[Optional[RequestContext]] = ContextVar("current_request", default=None)
+
+
+def statement_template(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(...)", " ".join(statement.split()))
+
+
+def _value_types(params: Any) -> Any:
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        types = [type(value).__name__ for value in params]
+        return types if len(types) <= 10 else f"{len(types)} params: {dict(Counter(types))}"
+    return type(params).__name__
+
+
+def bind_shape(parameters: Any, executemany: bool) -> str:
+    # Types and counts only: bound values can carry customer data and don't belong in logs
+    if executemany:
+        rows = list(parameters or [])
+        return f"{len(rows)} rows x {_value_types(rows[0]) if rows else None}"
+    return str(_value_types(parameters))
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["statement_started"].pop()
+    ctx = current_request.get()
+    if ctx is not None:
+        ctx.queries += 1
+        ctx.db_seconds += elapsed
+        ctx.statements[statement_template(statement)] += 1
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        logger.warning(
+            "Slow query %.1f ms request_id=%s route=%s binds=%s sql=%s",
+            elapsed * 1000,
+            ctx.request_id if ctx else "-",
+            f"{ctx.method} {ctx.route}" if ctx else "-",
+            bind_shape(parameters, executemany),
+            statement_template(statement),
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_statement_timer(exception_context):
+    # after_cursor_execute does not run for failed statements
+    conn = exception_context.connection
+    started = conn.info.get("statement_started") if conn is not None else None
+    if started:
+        started.pop()
+
+
+def report_repeated_statements(ctx: RequestContext) -> None:
+    """Log statements the request ran more than N_PLUS_ONE_THRESHOLD times, the usual N+1 pattern."""
+    threshold = settings.n_plus_one_threshold
+    if not threshold:
+        return
+    for template, count in ctx.statements.items():
+        if count > threshold:
+            logger.warning(
+                "Possible N+1: statement ran %d times request_id=%s route=%s %s sql=%s",
+                count, ctx.request_id, ctx.method, ctx.route, template,
+            )
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[list[str]]:
+    """Test helper: fail when the block runs more than `max_queries` SQL statements on any engine.
+
+        with query_budget(3):
+            client.get("/v1/emissions", headers=headers)
+    """
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement_template(statement))
+
+    event.listen(Engine, "after_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "after_cursor_execute", record)
+    if len(statements) > max_queries:
+        listing = "\n".join(f"  {n} x {sql}" for sql, n in Counter(statements).most_common())
+        raise AssertionError(f"{len(statements)} SQL statements, budget is {max_queries}:\n{listing}")
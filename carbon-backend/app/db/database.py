@@ -1,21 +1,42 @@
 from __future__ import annotations
 
-from typing import Iterator
+from typing import AsyncIterator, Iterator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
 
 from app.core.config import settings
+from app.db.pool import TimedAsyncQueuePool, TimedQueuePool, instrument_pool, pool_options
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(settings.database_url, pool_pre_ping=True, future=True)
+engine = create_engine(settings.database_url, future=True, **pool_options(settings.database_url, poolclass=TimedQueuePool))
+instrument_pool(engine)
 SessionLocal = sessionmaker(bind=engine, class_=Session, autoflush=False, autocommit=False, expire_on_commit=False)
 
 
+def async_database_url(url: str) -> str:
+    # The same database through the asyncio drivers: asyncpg for Postgres, aiosqlite for sqlite test DBs
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Read-heavy routes run on the event loop with this engine instead of occupying a threadpool worker
+_async_url = settings.async_database_url or async_database_url(settings.database_url)
+async_engine = create_async_engine(_async_url, **pool_options(_async_url, poolclass=TimedAsyncQueuePool))
+instrument_pool(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
 def get_db() -> Iterator[Session]:
     db = SessionLocal()
     try:
@@ -26,3 +47,13 @@ def get_db() -> Iterator[Session]:
         raise
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def insert_for(db: Session, target: Any):
+    # Dialect-specific INSERT so callers can use ON CONFLICT clauses (sqlite is used in local tests)
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(target)
+    return postgresql.insert(target)
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
-from sqlalchemy import BigInteger, Boolean, CheckConstraint, DateTime, Enum, ForeignKey, String, UniqueConstraint, JSON, Numeric
+from sqlalchemy import BigInteger, Boolean, CheckConstraint, Date, DateTime, Enum, ForeignKey, Index, String, Text, UniqueConstraint, JSON, Numeric
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .database import Base
@@ -15,6 +15,8 @@ class Organization(Base):
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     plan: Mapped[str] = mapped_column(String(50), default="free", nullable=False)
+    # Bumped on every commit that changes the org's emissions data; keys the analytics response cache
+    data_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
 
@@ -37,6 +39,8 @@ class User(Base):
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     role: Mapped[str] = mapped_column(String(20), nullable=False, default=UserRoleEnum.viewer)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    # Embedded in access tokens; bump it to revoke every token issued to the user so far
+    auth_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
 
@@ -89,6 +93,7 @@ class ActivityEvent(Base):
     __table_args__ = (
         UniqueConstraint("org_id", "hash_dedupe", name="uq_events_org_hash"),
         CheckConstraint("value_numeric >= 0", name="ck_events_value_nonneg"),
+        Index("ix_events_org_occurred_id", "org_id", "occurred_at", "id"),
     )
 
 
@@ -119,6 +124,10 @@ class Emission(Base):
     org_id: Mapped[int] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
     event_id: Mapped[int] = mapped_column(ForeignKey("activity_events.id", ondelete="CASCADE"), nullable=False, index=True)
     factor_id: Mapped[int] = mapped_column(ForeignKey("emission_factors.id", ondelete="RESTRICT"), nullable=False)
+    # Copied from the event at calc time so time/category/facility queries need no join
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    category: Mapped[str] = mapped_column(String(100), nullable=False)
+    facility_id: Mapped[Optional[int]] = mapped_column(ForeignKey("facilities.id", ondelete="SET NULL"), nullable=True)
     scope: Mapped[str] = mapped_column(String(5), nullable=False)
     co2e_kg: Mapped[float] = mapped_column(Numeric(18, 6), nullable=False)
     calc_version: Mapped[str] = mapped_column(String(20), nullable=False, default="v1")
@@ -129,4 +138,50 @@ class Emission(Base):
 
     __table_args__ = (
         UniqueConstraint("org_id", "event_id", name="uq_emissions_org_event"),
+        Index("ix_emissions_org_occurred", "org_id", "occurred_at"),
+        Index("ix_emissions_org_scope_occurred", "org_id", "scope", "occurred_at"),
+        Index("ix_emissions_org_category_occurred", "org_id", "category", "occurred_at"),
     )
+
+
+# Per-day emission totals, maintained in the same transaction as emissions by recalculate_for_events
+class EmissionRollupDaily(Base):
+    __tablename__ = "emission_rollups_daily"
+
+    org_id: Mapped[int] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # 0 when the event has no facility, so the column can be part of the primary key
+    facility_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, default=0)
+    category: Mapped[str] = mapped_column(String(100), primary_key=True)
+    scope: Mapped[str] = mapped_column(String(5), primary_key=True)
+    co2e_kg: Mapped[float] = mapped_column(Numeric(18, 6), nullable=False, default=0)
+    emissions_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class JobStatusEnum(str):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    org_id: Mapped[Optional[int]] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), nullable=True, index=True)
+    kind: Mapped[str] = mapped_column(String(30), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default=JobStatusEnum.queued)
+    params_json: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    payload_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    result_json: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    rows_processed: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    created_events: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    skipped_duplicates: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    rejected_rows: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    created_emissions: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
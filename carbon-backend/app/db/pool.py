@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+
+
+class PoolStats:
+    """Counters fed by pool events plus the time callers spent waiting to check a connection out."""
+
+    def __init__(self) -> None:
+        self.checkout_wait = Histogram()
+        self.checkout_timeouts = 0
+        self.connections_opened = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class _TimedCheckout:
+    # Pool events fire only once a connection is handed out, so the wait is timed around connect()
+    stats: PoolStats
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.incr("checkout_timeouts")
+            raise
+        finally:
+            self.stats.checkout_wait.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    stats = PoolStats()
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+
+def pool_options(url: str, *, poolclass: type) -> dict[str, Any]:
+    options: dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping}
+    # In-memory sqlite keeps its single shared connection pool
+    if make_url(url).get_backend_name() == "sqlite" and make_url(url).database in (None, "", ":memory:"):
+        return options
+    return {
+        **options,
+        "poolclass": poolclass,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+
+
+def instrument_pool(engine: Engine) -> None:
+    stats = getattr(engine.pool, "stats", None)
+    if stats is None:
+        return
+    event.listen(engine, "connect", lambda *_: stats.incr("connections_opened"))
+    event.listen(engine, "checkout", lambda *_: stats.incr("checkouts"))
+    event.listen(engine, "invalidate", lambda *_: stats.incr("invalidations"))
+
+
+def pool_status(engine: Engine) -> dict[str, Any]:
+    pool = engine.pool
+    stats = getattr(pool, "stats", None)
+    out: dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update(
+            pool_size=pool.size(),
+            max_overflow=settings.db_max_overflow,
+            timeout_seconds=pool.timeout(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            # QueuePool counts overflow from -pool_size; only connections beyond pool_size are overflow
+            overflow=max(pool.overflow(), 0),
+        )
+    if stats is not None:
+        wait = stats.checkout_wait.snapshot()
+        out.update(
+            connections_opened=stats.connections_opened,
+            checkouts=stats.checkouts,
+            invalidations=stats.invalidations,
+            checkout_timeouts=stats.checkout_timeouts,
+            checkout_wait={
+                "count": wait["count"],
+                "sum_ms": round(wait["sum"] * 1000, 3),
+                # le_ms null is the +Inf bucket
+                "buckets": [{"le_ms": bound * 1000 if bound != float("inf") else None, "count": n} for bound, n in wait["buckets"]],
+            },
+        )
+    return out
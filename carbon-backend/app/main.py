@@ -1,17 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from dotenv import load_dotenv
+# The only call: runs before app imports so settings and lazily created clients (OpenAI) see .env
 load_dotenv()
 from fastapi.middleware.cors import CORSMiddleware
 import socket
+from app.core.metrics import render_prometheus
 from app.core.middleware import request_context_middleware
 from app.api.v1.auth import router as auth_router
 from app.api.v1.tenants import router as tenants_router
 from app.api.v1.ingest import router as ingest_router
 from app.api.v1.ingest_upload import router as ingest_upload_router
+from app.api.v1.ingest_jobs import router as ingest_jobs_router
 from app.api.v1.factors import router as factors_router
 from app.api.v1.emissions import router as emissions_router
 from app.api.v1.analytics import router as analytics_router
 from app.api.v1.reports import router as reports_router
+from app.api.v1.admin import router as admin_router
 
 app = FastAPI(title="Carbon Footprint Monitoring API", version="0.1.0")
 
@@ -22,6 +26,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by browser clients: pagination cursor and analytics cache validator
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.middleware("http")(request_context_middleware)
@@ -32,14 +38,22 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    # Prometheus text exposition of this process's request and SQL metrics
+    return Response(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 app.include_router(auth_router)
 app.include_router(tenants_router)
 app.include_router(ingest_router)
 app.include_router(ingest_upload_router)
+app.include_router(ingest_jobs_router)
 app.include_router(factors_router)
 app.include_router(emissions_router)
 app.include_router(analytics_router)
 app.include_router(reports_router)
+app.include_router(admin_router)
 
 
 def get_ip_address() -> str:
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import ActivityEvent, Emission, EmissionRollupDaily as Rollup, Facility, Organization, User
+from app.services.analytics.queries import kpis_for_windows, last_event_time, scope_totals, top_categories, trend
+
+# Every list in the digest is capped, so its size (and the prompt built from it) does not grow with the org's data
+DIGEST_MONTHS = 12
+DIGEST_TOP_N = 5
+DIGEST_MISSING_CATEGORIES = 10
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _at_midnight(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day)
+
+
+def _growth_pct(current: float, previous: float) -> Optional[float]:
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 1)
+
+
+def _share_pct(part: float, total: float) -> Optional[float]:
+    return round(part / total * 100, 1) if total else None
+
+
+def _kg(value: float) -> float:
+    return round(float(value or 0), 2)
+
+
+def top_facilities(db: Session, *, org_id: int, limit: int = DIGEST_TOP_N) -> list[tuple[Optional[str], float]]:
+    amount = func.coalesce(func.sum(Rollup.co2e_kg), 0)
+    stmt = (
+        select(Facility.name, amount)
+        .select_from(Rollup)
+        # Rollups store events without a facility under facility_id 0, which matches no facility
+        .outerjoin(Facility, Facility.id == Rollup.facility_id)
+        .where(Rollup.org_id == org_id)
+        .group_by(Rollup.facility_id, Facility.name)
+        .having(func.sum(Rollup.emissions_count) > 0)
+        .order_by(amount.desc())
+        .limit(limit)
+    )
+    return [(name, float(kg or 0)) for name, kg in db.execute(stmt)]
+
+
+def missing_factor_categories(db: Session, *, org_id: int, limit: int = DIGEST_MISSING_CATEGORIES) -> list[tuple[str, int]]:
+    # Events with no emission row are the ones no emission factor resolved for
+    count = func.count()
+    stmt = (
+        select(ActivityEvent.category, count)
+        .outerjoin(Emission, Emission.event_id == ActivityEvent.id)
+        .where(ActivityEvent.org_id == org_id, Emission.id.is_(None))
+        .group_by(ActivityEvent.category)
+        .order_by(count.desc(), ActivityEvent.category)
+        .limit(limit)
+    )
+    return [(category, int(n)) for category, n in db.execute(stmt)]
+
+
+def build_digest(db: Session, *, org_id: int) -> Optional[dict[str, Any]]:
+    """Aggregate statistics the suggestions prompt needs for one org, computed in SQL.
+
+    Returns None when the org does not exist.
+    """
+    org = db.get(Organization, org_id)
+    if org is None:
+        return None
+
+    users_count, facilities_count, events_count, emissions_count = db.execute(
+        select(
+            select(func.count()).select_from(User).where(User.org_id == org_id).scalar_subquery(),
+            select(func.count()).select_from(Facility).where(Facility.org_id == org_id).scalar_subquery(),
+            select(func.count()).select_from(ActivityEvent).where(ActivityEvent.org_id == org_id).scalar_subquery(),
+            select(func.count()).select_from(Emission).where(Emission.org_id == org_id).scalar_subquery(),
+        )
+    ).one()
+    totals = scope_totals(db, org_id=org_id)
+    total = totals["total_co2e_kg"]
+    last_ev = last_event_time(db, org_id=org_id)
+
+    monthly: list[dict[str, Any]] = []
+    growth: dict[str, Optional[float]] = {}
+    if last_ev is not None:
+        # The trailing DIGEST_MONTHS calendar months up to and including the month of the latest event
+        end = _add_months(last_ev.date().replace(day=1), 1)
+        start = _add_months(end, -DIGEST_MONTHS)
+        by_month = dict(trend(db, org_id=org_id, date_from=_at_midnight(start), date_to=_at_midnight(end), grain="month"))
+        series = [(m, by_month.get(m, 0.0)) for m in (_add_months(start, i) for i in range(DIGEST_MONTHS))]
+        monthly = [{"month": m.strftime("%Y-%m"), "co2e_kg": _kg(kg)} for m, kg in series]
+        kg = [v for _, v in series]
+        previous_year = kpis_for_windows(db, org_id=org_id, windows=[(_at_midnight(_add_months(start, -DIGEST_MONTHS)), _at_midnight(start))])[0]
+        growth = {
+            "month_over_month_pct": _growth_pct(kg[-1], kg[-2]),
+            "last_3_months_vs_prior_3_pct": _growth_pct(sum(kg[-3:]), sum(kg[-6:-3])),
+            "last_12_months_vs_prior_12_pct": _growth_pct(sum(kg), previous_year["total_co2e_kg"]),
+        }
+
+    missing = missing_factor_categories(db, org_id=org_id)
+    return {
+        "organization": {"id": org.id, "name": org.name, "plan": org.plan},
+        "counts": {
+            "users": int(users_count or 0),
+            "facilities": int(facilities_count or 0),
+            "activity_events": int(events_count or 0),
+            "emissions": int(emissions_count or 0),
+            "events_missing_factor": int(events_count or 0) - int(emissions_count or 0),
+        },
+        "totals_kg": {key: _kg(value) for key, value in totals.items()},
+        "scope_share_pct": {f"scope{s}": _share_pct(totals[f"scope{s}_kg"], total) for s in ("1", "2", "3")},
+        "last_event_at": last_ev.isoformat() if last_ev else None,
+        "monthly_trend": monthly,
+        "growth": growth,
+        "top_facilities": [
+            {"facility": name or "unassigned", "co2e_kg": _kg(kg), "share_pct": _share_pct(kg, total)}
+            for name, kg in top_facilities(db, org_id=org_id)
+        ],
+        "top_categories": [
+            {"category": category, "co2e_kg": _kg(kg), "share_pct": _share_pct(kg, total)}
+            for category, kg in top_categories(db, org_id=org_id, limit=DIGEST_TOP_N)
+        ],
+        "missing_factor_categories": [{"category": category, "events": n} for category, n in missing],
+    }
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from functools import lru_cache
+from typing import Any, Protocol
+
+from app.core.config import settings
+
+SYSTEM_PROMPT = """You are an expert sustainability and carbon footprint analyst.
+Your job is to analyze organizational carbon emissions data and provide insights, observations, and recommendations in a clear, structured way.
+
+The data you receive is a statistical digest of the organization's records:
+- Record counts (users, facilities, activity events, emissions) and how many events have no matching emission factor
+- Total and scope-wise CO₂e emissions (Scope 1, 2, and 3) with each scope's share
+- A monthly CO₂e trend for the last 12 months and growth rates
+- The top facilities and activity categories by CO₂e, and the categories missing emission factors
+
+Analyze this information thoroughly and produce:
+1. **Overall Assessment**
+- Comment on whether the total and per-scope emissions appear high, moderate, or low.
+- Mention which scope dominates (Scope 1, 2, or 3) and why that might be.
+2. **Key Insights**
+- Highlight notable trends or anomalies (e.g., one facility producing 70% emissions, rapid monthly increase, etc.).
+- Identify any under-reported or missing activity areas.
+3. **Improvement Recommendations**
+- Provide 3–5 practical and measurable steps to reduce emissions (e.g., switch to renewable grid sources, optimize logistics, energy efficiency).
+- Suggest data-quality improvements (e.g., more granular reporting, missing factors).
+4. **Forecast or Target Suggestions**
+- Propose a realistic CO₂e reduction target for next quarter or year.
+- Suggest key KPIs the organization should track.
+
+Be concise but insightful — use short paragraphs and bullet points where needed. Avoid restating data directly; focus on interpretation and advice."""
+
+
+class SuggestionLLM(Protocol):
+    async def suggest(self, digest: dict[str, Any]) -> str: ...
+
+
+class OpenAISuggestionLLM:
+    def __init__(self, model: str, timeout: float) -> None:
+        # Imported on first use: langchain and the OpenAI SDK dominate app startup otherwise
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_openai import ChatOpenAI
+
+        self._prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT),
+            ("user", "Here is the organization's carbon data digest (JSON):\n\n{digest}"),
+        ])
+        # The client gives up on its own too, so a call nobody waits for any more still ends
+        self._chain = self._prompt | ChatOpenAI(model=model, timeout=timeout)
+
+    async def suggest(self, digest: dict[str, Any]) -> str:
+        response = await self._chain.ainvoke({"digest": json.dumps(digest, separators=(",", ":"))})
+        return response.content.strip()
+
+
+class FakeSuggestionLLM:
+    """Deterministic offline stand-in: echoes a few digest figures and records every call.
+
+    `delay` simulates model latency, e.g. to exercise timeouts and request coalescing.
+    """
+
+    def __init__(self, delay: float = 0) -> None:
+        self.delay = delay
+        self.calls: list[dict[str, Any]] = []
+
+    async def suggest(self, digest: dict[str, Any]) -> str:
+        self.calls.append(digest)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        totals = digest["totals_kg"]
+        return (
+            f"{digest['organization']['name']}: {totals['total_co2e_kg']} kg CO2e "
+            f"(scope 1 {totals['scope1_kg']}, scope 2 {totals['scope2_kg']}, scope 3 {totals['scope3_kg']}); "
+            f"{digest['counts']['events_missing_factor']} events missing a factor."
+        )
+
+
+@lru_cache(maxsize=1)
+def get_suggestion_llm() -> SuggestionLLM:
+    # FastAPI dependency; tests swap it through app.dependency_overrides
+    if settings.suggestions_llm_provider == "fake":
+        return FakeSuggestionLLM()
+    return OpenAISuggestionLLM(model=settings.suggestions_llm_model, timeout=settings.suggestions_timeout_seconds)
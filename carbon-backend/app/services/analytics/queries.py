@@ -1,23 +1,34 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Any
+from collections import OrderedDict
+from datetime import date, datetime, time
+from typing import Any, Literal, Optional
 
-from sqlalchemy import func, select
+from sqlalchemy import Date, DateTime, and_, case, func, literal, select, union_all
 from sqlalchemy.orm import Session
 
-from app.db.models import Emission, ActivityEvent
+from app.db.models import Emission, ActivityEvent, EmissionRollupDaily as Rollup
+from app.utils.time import naive_utc
 
 
-def kpis(db: Session, *, org_id: int, date_from: datetime, date_to: datetime) -> dict[str, Any]:
-    total = db.scalar(
-        select(func.coalesce(func.sum(Emission.co2e_kg), 0)).where(
-            Emission.org_id == org_id, Emission.created_at >= date_from, Emission.created_at < date_to
-        )
-    )
-    scope1 = db.scalar(select(func.coalesce(func.sum(Emission.co2e_kg), 0)).where(Emission.org_id == org_id, Emission.scope == "1"))
-    scope2 = db.scalar(select(func.coalesce(func.sum(Emission.co2e_kg), 0)).where(Emission.org_id == org_id, Emission.scope == "2"))
-    scope3 = db.scalar(select(func.coalesce(func.sum(Emission.co2e_kg), 0)).where(Emission.org_id == org_id, Emission.scope == "3"))
+def day_window(date_from: datetime, date_to: datetime) -> Optional[tuple[date, date]]:
+    # Rollups hold whole UTC days, so only windows starting and ending at midnight can be served from them
+    start, end = naive_utc(date_from), naive_utc(date_to)
+    if start.time() != time() or end.time() != time():
+        return None
+    return start.date(), end.date()
+
+
+def _scope_sums(amount, scope) -> list:
+    return [
+        func.coalesce(func.sum(amount), 0),
+        func.coalesce(func.sum(case((scope == "1", amount), else_=0)), 0),
+        func.coalesce(func.sum(case((scope == "2", amount), else_=0)), 0),
+        func.coalesce(func.sum(case((scope == "3", amount), else_=0)), 0),
+    ]
+
+
+def _kpis_dict(total, scope1, scope2, scope3) -> dict[str, Any]:
     return {
         "total_co2e_kg": float(total or 0),
         "scope1_kg": float(scope1 or 0),
@@ -26,5 +37,103 @@ def kpis(db: Session, *, org_id: int, date_from: datetime, date_to: datetime) ->
     }
 
 
+def _windows_table(windows: list[tuple[int, Any, Any]], type_):
+    # (idx, start, end) literals as a derived table; UNION ALL keeps it portable across dialects
+    parts = [select(literal(idx).label("idx"), literal(start, type_).label("w_start"), literal(end, type_).label("w_end")) for idx, start, end in windows]
+    return (parts[0] if len(parts) == 1 else union_all(*parts)).subquery("windows")
+
+
+def kpis_for_windows(db: Session, *, org_id: int, windows: list[tuple[datetime, datetime]]) -> list[dict[str, Any]]:
+    """Total and per-scope co2e for events occurring in each [start, end) window.
+
+    Day-aligned windows are answered together from the rollup and the rest together from raw
+    emissions, so any number of windows costs at most two grouped queries.
+    """
+    by_rollup: list[tuple[int, date, date]] = []
+    by_events: list[tuple[int, datetime, datetime]] = []
+    for idx, (start, end) in enumerate(windows):
+        days = day_window(start, end)
+        if days:
+            by_rollup.append((idx, *days))
+        else:
+            by_events.append((idx, naive_utc(start), naive_utc(end)))
+
+    out: list[dict[str, Any]] = [_kpis_dict(0, 0, 0, 0) for _ in windows]
+    if by_rollup:
+        w = _windows_table(by_rollup, Date())
+        stmt = (
+            select(w.c.idx, *_scope_sums(Rollup.co2e_kg, Rollup.scope))
+            .select_from(w)
+            .join(Rollup, and_(Rollup.org_id == org_id, Rollup.day >= w.c.w_start, Rollup.day < w.c.w_end))
+            .group_by(w.c.idx)
+        )
+        for idx, *sums in db.execute(stmt):
+            out[idx] = _kpis_dict(*sums)
+    if by_events:
+        w = _windows_table(by_events, DateTime())
+        stmt = (
+            select(w.c.idx, *_scope_sums(Emission.co2e_kg, Emission.scope))
+            .select_from(w)
+            .join(Emission, and_(Emission.org_id == org_id, Emission.occurred_at >= w.c.w_start, Emission.occurred_at < w.c.w_end))
+            .group_by(w.c.idx)
+        )
+        for idx, *sums in db.execute(stmt):
+            out[idx] = _kpis_dict(*sums)
+    return out
+
+
+def kpis(db: Session, *, org_id: int, date_from: datetime, date_to: datetime) -> dict[str, Any]:
+    """Total and per-scope co2e for events occurring in [date_from, date_to), in one scan."""
+    return kpis_for_windows(db, org_id=org_id, windows=[(date_from, date_to)])[0]
+
+
+def trend(db: Session, *, org_id: int, date_from: datetime, date_to: datetime, grain: Literal["day", "month"]) -> list[tuple[date, float]]:
+    days = day_window(date_from, date_to)
+    if days:
+        stmt = (
+            select(Rollup.day, func.sum(Rollup.co2e_kg))
+            .where(Rollup.org_id == org_id, Rollup.day >= days[0], Rollup.day < days[1])
+            .group_by(Rollup.day)
+            # Rows whose emissions were all recomputed away linger with a zero count
+            .having(func.sum(Rollup.emissions_count) > 0)
+            .order_by(Rollup.day)
+        )
+        daily = [(d, float(kg or 0)) for d, kg in db.execute(stmt)]
+    else:
+        period = func.date_trunc("day", Emission.occurred_at, type_=DateTime)
+        stmt = (
+            select(period.label("period"), func.coalesce(func.sum(Emission.co2e_kg), 0))
+            .where(Emission.org_id == org_id, Emission.occurred_at >= naive_utc(date_from), Emission.occurred_at < naive_utc(date_to))
+            .group_by("period")
+            .order_by("period")
+        )
+        daily = [(ts.date(), float(kg or 0)) for ts, kg in db.execute(stmt)]
+    if grain == "day":
+        return daily
+    # At most a few hundred days per year, so folding into months here is cheaper than a second dialect-specific query
+    months: OrderedDict[date, float] = OrderedDict()
+    for d, kg in daily:
+        month = d.replace(day=1)
+        months[month] = months.get(month, 0.0) + kg
+    return list(months.items())
+
+
+def scope_totals(db: Session, *, org_id: int) -> dict[str, Any]:
+    return _kpis_dict(*db.execute(select(*_scope_sums(Rollup.co2e_kg, Rollup.scope)).where(Rollup.org_id == org_id)).one())
+
+
+def top_categories(db: Session, *, org_id: int, limit: int = 5) -> list[tuple[str, float]]:
+    amount = func.coalesce(func.sum(Rollup.co2e_kg), 0)
+    stmt = (
+        select(Rollup.category, amount)
+        .where(Rollup.org_id == org_id)
+        .group_by(Rollup.category)
+        .having(func.sum(Rollup.emissions_count) > 0)
+        .order_by(amount.desc())
+        .limit(limit)
+    )
+    return [(category, float(kg or 0)) for category, kg in db.execute(stmt)]
+
+
 def last_event_time(db: Session, *, org_id: int) -> datetime | None:
     return db.scalar(select(func.max(ActivityEvent.occurred_at)).where(ActivityEvent.org_id == org_id))
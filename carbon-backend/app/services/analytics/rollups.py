@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.dialect import insert_for
+from app.db.models import Emission, EmissionRollupDaily, Organization
+from app.utils.time import naive_utc
+
+
+class RollupKey(NamedTuple):
+    org_id: int
+    day: date
+    facility_id: int
+    category: str
+    scope: str
+
+
+class RollupDeltas:
+    """Signed (co2e_kg, count) changes per rollup row, accumulated while emissions are written."""
+
+    def __init__(self) -> None:
+        self._deltas: dict[RollupKey, list] = defaultdict(lambda: [0.0, 0])
+
+    def add(self, *, org_id: int, occurred_at: datetime, facility_id: Optional[int], category: str, scope: str, co2e_kg: float, sign: int = 1) -> None:
+        key = RollupKey(org_id, naive_utc(occurred_at).date(), facility_id or 0, category, scope)
+        delta = self._deltas[key]
+        # Emissions are stored at 6 decimals; add what the column holds, not the raw float
+        delta[0] += sign * round(float(co2e_kg), 6)
+        delta[1] += sign
+
+    def apply(self, db: Session) -> None:
+        rows = [
+            {**key._asdict(), "co2e_kg": round(kg, 6), "emissions_count": count}
+            # Stable key order keeps concurrent writers locking rollup rows in the same sequence
+            for key, (kg, count) in sorted(self._deltas.items())
+            if count or round(kg, 6)
+        ]
+        if not rows:
+            return
+        stmt = insert_for(db, EmissionRollupDaily)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(RollupKey._fields),
+            set_={
+                "co2e_kg": EmissionRollupDaily.co2e_kg + stmt.excluded.co2e_kg,
+                "emissions_count": EmissionRollupDaily.emissions_count + stmt.excluded.emissions_count,
+            },
+        )
+        db.execute(stmt, rows)
+        self._deltas.clear()
+
+
+def rebuild_rollups(db: Session, *, org_id: Optional[int] = None) -> int:
+    """Recreate rollup rows from emissions for one org (or all); returns the number of rows written.
+
+    Pause ingestion and recompute for the org while this runs: their deltas would otherwise land on
+    rows that are being replaced.
+    """
+    clear = delete(EmissionRollupDaily)
+    if org_id is not None:
+        clear = clear.where(EmissionRollupDaily.org_id == org_id)
+    db.execute(clear)
+
+    day = func.date(Emission.occurred_at)
+    facility = func.coalesce(Emission.facility_id, 0)
+    source = (
+        select(Emission.org_id, day, facility, Emission.category, Emission.scope, func.sum(Emission.co2e_kg), func.count())
+        .group_by(Emission.org_id, day, facility, Emission.category, Emission.scope)
+    )
+    if org_id is not None:
+        source = source.where(Emission.org_id == org_id)
+    # Rebuilt totals may differ from what analytics responses were cached from
+    bump = update(Organization).values(data_version=Organization.data_version + 1)
+    if org_id is not None:
+        bump = bump.where(Organization.id == org_id)
+    db.execute(bump)
+    result = db.execute(
+        insert(EmissionRollupDaily).from_select(
+            ["org_id", "day", "facility_id", "category", "scope", "co2e_kg", "emissions_count"], source
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from typing import Any, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.analytics.llm import SuggestionLLM
+
+# digest hash -> generated message. The digest changes whenever the org's figures do, so an entry is
+# reused exactly as long as the data it was generated from is current.
+suggestion_cache = TTLCache(maxsize=settings.suggestions_cache_max_entries, ttl_seconds=settings.suggestions_cache_ttl_seconds)
+
+# (org_id, data watermark) -> hash of the digest built at that watermark. While the watermark holds,
+# the cached suggestion is found without running the digest's aggregate queries again.
+digest_keys = TTLCache(maxsize=settings.suggestions_cache_max_entries, ttl_seconds=settings.suggestions_cache_ttl_seconds)
+
+# digest hash -> in-flight generation, shared by every request for the same digest in this process
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def digest_hash(digest: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(digest, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def cached_suggestion(*, org_id: int, watermark: int) -> Optional[str]:
+    key = digest_keys.get((org_id, watermark))
+    return suggestion_cache.get(key) if key is not None else None
+
+
+def remember_digest(digest: dict[str, Any], *, org_id: int, watermark: int) -> None:
+    digest_keys.set((org_id, watermark), digest_hash(digest))
+
+
+async def _generate(llm: SuggestionLLM, digest: dict[str, Any], key: str) -> str:
+    message = await llm.suggest(digest)
+    suggestion_cache.set(key, message)
+    return message
+
+
+async def get_suggestion(llm: SuggestionLLM, digest: dict[str, Any]) -> str:
+    """Cached suggestion for the digest, or one LLM call shared by all concurrent callers.
+
+    Raises TimeoutError after SUGGESTIONS_TIMEOUT_SECONDS. The shared call keeps running for the
+    other waiters and still fills the cache when it finishes.
+    """
+    key = digest_hash(digest)
+    message = suggestion_cache.get(key)
+    if message is not None:
+        return message
+    task = _inflight.get(key)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_generate(llm, digest, key))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _inflight.pop(key, None) if _inflight.get(key) is done else None)
+    # shield: one caller timing out must not cancel the call the others are waiting on
+    return await asyncio.wait_for(asyncio.shield(task), timeout=settings.suggestions_timeout_seconds)
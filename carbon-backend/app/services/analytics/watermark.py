@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import Organization
+
+# org_id -> data_version. Commits in this process update it directly; changes committed by other
+# processes (workers, other API replicas) are picked up once the entry expires.
+watermarks = TTLCache(maxsize=settings.analytics_cache_max_entries, ttl_seconds=settings.analytics_watermark_ttl_seconds)
+
+# (endpoint, org_id, params, watermark) -> encoded response body
+response_cache = TTLCache(maxsize=settings.analytics_cache_max_entries, ttl_seconds=settings.analytics_cache_ttl_seconds)
+
+
+def mark_org_data_changed(db: Session, *, org_id: int) -> None:
+    """Bump the org's data watermark when the session's transaction commits."""
+    db.info.setdefault("data_changed_orgs", set()).add(org_id)
+
+
+def current_watermark(db: Session, *, org_id: int) -> int:
+    version = watermarks.get(org_id)
+    if version is None:
+        version = db.scalar(select(Organization.data_version).where(Organization.id == org_id)) or 0
+        watermarks.set(org_id, version)
+    return version
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session: Session) -> None:
+    orgs = session.info.pop("data_changed_orgs", None)
+    if not orgs:
+        return
+    rows = session.execute(
+        update(Organization)
+        .where(Organization.id.in_(sorted(orgs)))
+        .values(data_version=Organization.data_version + 1)
+        .returning(Organization.id, Organization.data_version)
+    )
+    session.info["committed_watermarks"] = dict(rows.all())
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    for org_id, version in session.info.pop("committed_watermarks", {}).items():
+        watermarks.set(org_id, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("data_changed_orgs", None)
+    session.info.pop("committed_watermarks", None)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import EmissionFactor
+from app.services.calc.factor_index import FactorIndex, FactorRef
+from app.utils.time import naive_utc
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Process-wide; values are (generation, FactorIndex). An entry is only used while its category's
+# generation in the database is unchanged, so factor writes from any process take effect on the next lookup.
+factor_cache = TTLCache(maxsize=settings.factor_cache_max_entries, ttl_seconds=settings.factor_cache_ttl_seconds)
+
+
+class FactorKey(NamedTuple):
+    category: str
+    geography: str
+    bucket: datetime
+
+
+def _bucket_width() -> timedelta:
+    return timedelta(days=settings.factor_cache_bucket_days)
+
+
+def factor_key(category: str, occurred_at: datetime, geography: Optional[str]) -> FactorKey:
+    width = _bucket_width()
+    ts = naive_utc(occurred_at)
+    return FactorKey(category, (geography or "GLOBAL").upper(), _EPOCH + ((ts - _EPOCH) // width) * width)
+
+
+def _generations(db: Session, categories: set[str]) -> dict[str, tuple[Any, ...]]:
+    # Changes whenever a factor of the category is inserted or deleted, or edited with updated_at bumped;
+    # categories without factors are absent
+    stmt = (
+        select(EmissionFactor.category, func.count(), func.max(EmissionFactor.id), func.max(EmissionFactor.updated_at))
+        .where(EmissionFactor.category.in_(categories))
+        .group_by(EmissionFactor.category)
+    )
+    return {category: tuple(gen) for category, *gen in db.execute(stmt)}
+
+
+def _load(db: Session, keys: list[FactorKey]) -> dict[FactorKey, FactorIndex]:
+    # One query covers every missing (category, bucket); rows are then split per key in memory
+    width = _bucket_width()
+    stmt = select(EmissionFactor).where(
+        EmissionFactor.category.in_({k.category for k in keys}),
+        EmissionFactor.valid_from < max(k.bucket for k in keys) + width,
+        EmissionFactor.valid_to >= min(k.bucket for k in keys),
+    )
+    refs = [FactorRef.from_row(f) for f in db.scalars(stmt)]
+    loaded: dict[FactorKey, FactorIndex] = {}
+    for key in keys:
+        geographies = {key.geography, "GLOBAL"}
+        loaded[key] = FactorIndex(
+            r for r in refs
+            if r.category == key.category and r.geography.upper() in geographies and r.valid_to >= key.bucket and r.valid_from < key.bucket + width
+        )
+    return loaded
+
+
+def resolve_factors(db: Session, lookups: Iterable[tuple[str, datetime, Optional[str]]]) -> list[Optional[FactorRef]]:
+    """Resolve (category, occurred_at, geography) lookups through the cache.
+
+    Every call costs one grouped query for the categories' generations, plus one query in total for
+    entries that are missing or were cached under an older generation.
+    """
+    lookups = list(lookups)
+    keys = [factor_key(category, occurred_at, geography) for category, occurred_at, geography in lookups]
+    if not keys:
+        return []
+    # Read before loading: a factor committed in between leaves the new entries stamped with the old
+    # generation, so they are reloaded on the next call rather than served stale until the TTL
+    generations = _generations(db, {key.category for key in keys})
+    indexes: dict[FactorKey, FactorIndex] = {}
+    missing: list[FactorKey] = []
+    for key in set(keys):
+        cached = factor_cache.get(key)
+        if cached is None or cached[0] != generations.get(key.category):
+            missing.append(key)
+        else:
+            indexes[key] = cached[1]
+    if missing:
+        for key, index in _load(db, missing).items():
+            factor_cache.set(key, (generations.get(key.category), index))
+            indexes[key] = index
+    return [
+        indexes[key].lookup(category=category, occurred_at=occurred_at, geography=geography)
+        for key, (category, occurred_at, geography) in zip(keys, lookups)
+    ]
+
+
+def invalidate_factor_cache_on_commit(db: Session, *, category: str) -> None:
+    """Drop cached entries for `category` once the session's transaction commits."""
+    db.info.setdefault("factor_cache_dirty", set()).add(category)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    categories = session.info.pop("factor_cache_dirty", None)
+    if categories:
+        factor_cache.invalidate(lambda key: key.category in categories)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop("factor_cache_dirty", None)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from app.db.models import EmissionFactor
+from app.utils.time import naive_utc
+
+# valid_to is inclusive; DateTime columns resolve to microseconds, so the next interval starts 1us later
+_RESOLUTION = timedelta(microseconds=1)
+
+
+@dataclass(frozen=True)
+class FactorRef:
+    """Detached, immutable copy of the EmissionFactor fields the calculator and preview need."""
+
+    id: int
+    category: str
+    geography: str
+    version: int
+    valid_from: datetime
+    valid_to: datetime
+    factor_value: float
+    method: str
+
+    @classmethod
+    def from_row(cls, f: EmissionFactor) -> "FactorRef":
+        return cls(
+            id=f.id,
+            category=f.category,
+            geography=f.geography,
+            version=int(f.version),
+            valid_from=naive_utc(f.valid_from),
+            valid_to=naive_utc(f.valid_to),
+            factor_value=float(f.factor_value),
+            method=f.method,
+        )
+
+
+class _Timeline:
+    """Non-overlapping intervals for one (category, geography); starts[i] begins the interval won by winners[i]."""
+
+    __slots__ = ("starts", "winners")
+
+    def __init__(self, factors: list[FactorRef]):
+        points = sorted({f.valid_from for f in factors} | {f.valid_to + _RESOLUTION for f in factors})
+        self.starts: list[datetime] = []
+        self.winners: list[Optional[FactorRef]] = []
+        for point in points:
+            covering = [f for f in factors if f.valid_from <= point <= f.valid_to]
+            # pick highest version, then latest valid_from
+            winner = max(covering, key=lambda f: (f.version, f.valid_from)) if covering else None
+            if self.winners and self.winners[-1] == winner:
+                continue
+            self.starts.append(point)
+            self.winners.append(winner)
+
+    def at(self, ts: datetime) -> Optional[FactorRef]:
+        i = bisect_right(self.starts, ts) - 1
+        return self.winners[i] if i >= 0 else None
+
+
+class FactorIndex:
+    """In-memory factor resolution: O(log n) bisect on occurred_at per (category, geography).
+
+    Resolution matches select_best_factor: a factor for the requested geography wins if one is valid
+    at the timestamp, otherwise the best GLOBAL factor is used.
+    """
+
+    def __init__(self, factors: Iterable[EmissionFactor | FactorRef]):
+        groups: dict[tuple[str, str], list[FactorRef]] = defaultdict(list)
+        for f in factors:
+            ref = f if isinstance(f, FactorRef) else FactorRef.from_row(f)
+            groups[(ref.category, ref.geography.upper())].append(ref)
+        self._timelines = {key: _Timeline(refs) for key, refs in groups.items()}
+
+    def __len__(self) -> int:
+        return len(self._timelines)
+
+    def lookup(self, *, category: str, occurred_at: datetime, geography: Optional[str] = None) -> Optional[FactorRef]:
+        ts = naive_utc(occurred_at)
+        if geography:
+            timeline = self._timelines.get((category, geography.upper()))
+            found = timeline.at(ts) if timeline else None
+            if found:
+                return found
+        timeline = self._timelines.get((category, "GLOBAL"))
+        return timeline.at(ts) if timeline else None
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import ActivityEvent, Emission, EmissionFactor, Job
+from app.services.calc.factor_cache import factor_cache, resolve_factors
+from app.services.calc.worker_stub import RecalcResult, recalculate_for_events
+from app.utils.time import naive_utc, parse_dt
+
+JOB_KIND_RECOMPUTE = "recompute"
+JOB_KIND_FACTOR_RECOMPUTE = "factor_recompute"
+
+
+def recompute_params(*, since: Optional[datetime], until: Optional[datetime], chunk_size: Optional[int]) -> dict:
+    return {
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat() if until else None,
+        "chunk_size": chunk_size or settings.recompute_chunk_size,
+    }
+
+
+def _tally(job: Job, result: dict, recalc: RecalcResult) -> dict:
+    # New emissions go to the job's created_emissions column; the rest are kept in result_json
+    job.created_emissions += recalc.new
+    counts = {f"{name}_emissions": result.get(f"{name}_emissions", 0) + getattr(recalc, name) for name in ("changed", "unchanged", "removed")}
+    return {**result, **counts}
+
+
+def _window(stmt, *, org_id: int, params: dict):
+    stmt = stmt.where(ActivityEvent.org_id == org_id)
+    if params.get("since"):
+        stmt = stmt.where(ActivityEvent.occurred_at >= naive_utc(parse_dt(params["since"])))
+    if params.get("until"):
+        stmt = stmt.where(ActivityEvent.occurred_at < naive_utc(parse_dt(params["until"])))
+    return stmt
+
+
+def process_recompute_job(db: Session, job: Job) -> None:
+    """Walk the org's events in (occurred_at, id) order, committing emissions and a checkpoint per chunk."""
+    params = job.params_json or {}
+    size = int(params.get("chunk_size") or settings.recompute_chunk_size)
+    result = dict(job.result_json or {})
+    if "total_events" not in result:
+        result["total_events"] = db.scalar(_window(select(func.count()).select_from(ActivityEvent), org_id=job.org_id, params=params))
+        job.result_json = result
+        db.commit()
+
+    while True:
+        stmt = _window(select(ActivityEvent.id, ActivityEvent.occurred_at), org_id=job.org_id, params=params)
+        checkpoint = result.get("checkpoint")
+        if checkpoint:
+            last = (datetime.fromisoformat(checkpoint["occurred_at"]), checkpoint["id"])
+            stmt = stmt.where(tuple_(ActivityEvent.occurred_at, ActivityEvent.id) > last)
+        chunk = db.execute(stmt.order_by(ActivityEvent.occurred_at, ActivityEvent.id).limit(size)).all()
+        if not chunk:
+            break
+        recalc = recalculate_for_events(db, org_id=job.org_id, event_ids=[row.id for row in chunk])
+        job.rows_processed += len(chunk)
+        result = {**_tally(job, result, recalc), "checkpoint": {"occurred_at": chunk[-1].occurred_at.isoformat(), "id": chunk[-1].id}}
+        job.result_json = result
+        db.commit()
+        if len(chunk) < size:
+            break
+
+
+def process_factor_recompute_job(db: Session, job: Job) -> None:
+    """Recompute, across all orgs, only the events a newly written factor now wins resolution for.
+
+    Candidates are events of the factor's category inside [valid_from, valid_to], walked by id in
+    chunks; each is re-resolved and kept only if the new factor wins and the stored emission does
+    not already use it.
+    """
+    factor = db.get(EmissionFactor, (job.params_json or {})["factor_id"])
+    if factor is None:
+        return
+    # This process may hold entries cached before the factor was committed
+    factor_cache.invalidate(lambda key: key.category == factor.category)
+    size = settings.recompute_chunk_size
+    result = dict(job.result_json or {})
+
+    while True:
+        stmt = (
+            select(ActivityEvent.id, ActivityEvent.org_id, ActivityEvent.occurred_at, Emission.factor_id)
+            .outerjoin(Emission, Emission.event_id == ActivityEvent.id)
+            .where(
+                ActivityEvent.category == factor.category,
+                ActivityEvent.occurred_at >= factor.valid_from,
+                ActivityEvent.occurred_at <= factor.valid_to,
+                ActivityEvent.id > result.get("checkpoint_id", 0),
+            )
+            .order_by(ActivityEvent.id)
+            .limit(size)
+        )
+        chunk = db.execute(stmt).all()
+        if not chunk:
+            break
+        winners = resolve_factors(db, ((factor.category, row.occurred_at, None) for row in chunk))
+        affected: dict[int, list[int]] = defaultdict(list)
+        for row, winner in zip(chunk, winners):
+            if winner is not None and winner.id == factor.id and row.factor_id != factor.id:
+                affected[row.org_id].append(row.id)
+        for org_id, event_ids in affected.items():
+            result = _tally(job, result, recalculate_for_events(db, org_id=org_id, event_ids=event_ids))
+        job.rows_processed += len(chunk)
+        result = {
+            **result,
+            "checkpoint_id": chunk[-1].id,
+            "affected_events": result.get("affected_events", 0) + sum(len(ids) for ids in affected.values()),
+        }
+        job.result_json = result
+        db.commit()
+        if len(chunk) < size:
+            break
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.db.models import ActivityEvent, Emission, EmissionFactor
+from app.db.dialect import insert_for
+from app.db.models import ActivityEvent, Emission
+from app.services.analytics.rollups import RollupDeltas
+from app.services.analytics.watermark import mark_org_data_changed
+from app.services.calc.factor_cache import resolve_factors
+from app.services.calc.factor_index import FactorRef
+from app.utils.time import naive_utc
+
+# Columns refreshed when an existing emission is recomputed; id and created_at are kept
+UPSERT_COLUMNS = ("factor_id", "scope", "co2e_kg", "calc_version", "uncertainty_pct", "provenance_json", "updated_at")
 
 
 def infer_scope(category: str) -> str:
@@ -18,60 +28,164 @@ def infer_scope(category: str) -> str:
     return "3"
 
 
-def select_best_factor(db: Session, *, category: str, occurred_at: datetime, geography: Optional[str]) -> Optional[EmissionFactor]:
-    stmt = (
-        select(EmissionFactor)
-        .where(EmissionFactor.category == category)
-        .where(EmissionFactor.valid_from <= occurred_at)
-        .where(EmissionFactor.valid_to >= occurred_at)
-    )
-    factors = list(db.scalars(stmt))
-    if geography:
-        geo_matched = [f for f in factors if f.geography.upper() == geography.upper()]
-    else:
-        geo_matched = []
-    global_matched = [f for f in factors if f.geography.upper() == "GLOBAL"]
-    candidates = geo_matched or global_matched
-    if not candidates:
-        return None
-    # pick highest version, then latest valid_from
-    candidates.sort(key=lambda f: (f.version, f.valid_from), reverse=True)
-    return candidates[0]
+def select_best_factor(db: Session, *, category: str, occurred_at: datetime, geography: Optional[str]) -> Optional[FactorRef]:
+    return resolve_factors(db, [(category, occurred_at, geography)])[0]
 
 
-def calculate_emission_for_event(db: Session, *, org_id: int, event: ActivityEvent) -> Optional[Emission]:
-    factor = select_best_factor(db, category=event.category, occurred_at=event.occurred_at, geography=None)
-    if not factor:
-        return None
-    co2e_kg = float(event.value_numeric) * float(factor.factor_value)
-    emission = Emission(
-        org_id=org_id,
-        event_id=event.id,
-        factor_id=factor.id,
-        scope=event.scope_hint or infer_scope(event.category),
-        co2e_kg=co2e_kg,
-        calc_version="v1",
-        uncertainty_pct=None,
-        provenance_json={
+def emission_values(
+    *,
+    org_id: int,
+    event_id: int,
+    occurred_at: datetime,
+    facility_id: Optional[int],
+    category: str,
+    value_numeric: float,
+    scope_hint: Optional[str],
+    factor: FactorRef,
+) -> dict[str, Any]:
+    return {
+        "org_id": org_id,
+        "event_id": event_id,
+        "occurred_at": naive_utc(occurred_at),
+        "category": category,
+        "facility_id": facility_id,
+        "factor_id": factor.id,
+        "scope": scope_hint or infer_scope(category),
+        "co2e_kg": float(value_numeric) * float(factor.factor_value),
+        "calc_version": "v1",
+        "uncertainty_pct": None,
+        "provenance_json": {
             "formula": "value * factor_value",
             "factor_version": factor.version,
             "geography": factor.geography,
             "method": factor.method,
         },
+    }
+
+
+def calculate_emission_for_event(db: Session, *, org_id: int, event: ActivityEvent) -> Optional[Emission]:
+    factor = select_best_factor(db, category=event.category, occurred_at=event.occurred_at, geography=None)
+    if not factor:
+        return None
+    emission = Emission(
+        **emission_values(
+            org_id=org_id,
+            event_id=event.id,
+            occurred_at=event.occurred_at,
+            facility_id=event.facility_id,
+            category=event.category,
+            value_numeric=event.value_numeric,
+            scope_hint=event.scope_hint,
+            factor=factor,
+        )
     )
     db.add(emission)
+    deltas = RollupDeltas()
+    deltas.add(org_id=org_id, occurred_at=event.occurred_at, facility_id=event.facility_id, category=event.category, scope=emission.scope, co2e_kg=emission.co2e_kg)
+    deltas.apply(db)
+    mark_org_data_changed(db, org_id=org_id)
     return emission
 
 
-def recalculate_for_events(db: Session, *, org_id: int, event_ids: list[int]) -> int:
+@dataclass
+class RecalcResult:
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    # Events that had an emission but no longer resolve a factor
+    removed: int = 0
+
+    @property
+    def written(self) -> int:
+        return self.new + self.changed
+
+
+def _same_emission(existing, values: dict[str, Any]) -> bool:
+    # co2e_kg is Numeric(18, 6); compare at stored precision so float noise does not count as a change
+    return (
+        existing.factor_id == values["factor_id"]
+        and existing.scope == values["scope"]
+        and round(float(existing.co2e_kg), 6) == round(values["co2e_kg"], 6)
+    )
+
+
+def recalculate_for_events(db: Session, *, org_id: int, event_ids: list[int]) -> RecalcResult:
+    """Recompute emissions for a batch of events, writing only rows whose factor, scope or co2e changed.
+
+    Changed and new rows go through one INSERT .. ON CONFLICT (org_id, event_id) DO UPDATE, so unchanged
+    emissions keep their id, created_at and index entries. Factors come from the cache. The matching
+    emission_rollups_daily deltas are applied in the same transaction.
+    """
+    out = RecalcResult()
     if not event_ids:
-        return 0
-    deleted = db.query(Emission).filter(Emission.org_id == org_id, Emission.event_id.in_(event_ids)).delete(synchronize_session=False)
-    # re-create
-    events = list(db.scalars(select(ActivityEvent).where(ActivityEvent.org_id == org_id, ActivityEvent.id.in_(event_ids))))
-    created = 0
-    for ev in events:
-        em = calculate_emission_for_event(db, org_id=org_id, event=ev)
-        if em:
-            created += 1
-    return created
+        return out
+    events = db.execute(
+        select(ActivityEvent.id, ActivityEvent.occurred_at, ActivityEvent.facility_id, ActivityEvent.category, ActivityEvent.value_numeric, ActivityEvent.scope_hint)
+        .where(ActivityEvent.org_id == org_id, ActivityEvent.id.in_(event_ids))
+        .order_by(ActivityEvent.id)
+        # Serializes recomputes of the same events (e.g. a factor job and an org job). Locking existing
+        # emissions alone would let two writers both see "no emission yet" and both add it to the rollup.
+        # NO KEY UPDATE still lets emission inserts take their foreign-key share lock; id order avoids deadlocks.
+        .with_for_update(key_share=True)
+    ).all()
+    if not events:
+        return out
+    existing = {
+        row.event_id: row
+        for row in db.execute(
+            select(Emission.event_id, Emission.factor_id, Emission.scope, Emission.co2e_kg)
+            .where(Emission.org_id == org_id, Emission.event_id.in_(event_ids))
+            # Rollup deltas are derived from these values; read after the event locks, so this sees
+            # whatever a recompute that held them before us committed
+            .with_for_update()
+        )
+    }
+    factors = resolve_factors(db, ((ev.category, ev.occurred_at, None) for ev in events))
+
+    now = datetime.utcnow()
+    rows: list[dict[str, Any]] = []
+    stale: list[int] = []
+    deltas = RollupDeltas()
+    for ev, factor in zip(events, factors):
+        current = existing.get(ev.id)
+        rollup = {"org_id": org_id, "occurred_at": ev.occurred_at, "facility_id": ev.facility_id, "category": ev.category}
+        if factor is None:
+            if current is not None:
+                stale.append(ev.id)
+                deltas.add(**rollup, scope=current.scope, co2e_kg=current.co2e_kg, sign=-1)
+            continue
+        values = emission_values(
+            org_id=org_id,
+            event_id=ev.id,
+            occurred_at=ev.occurred_at,
+            facility_id=ev.facility_id,
+            category=ev.category,
+            value_numeric=ev.value_numeric,
+            scope_hint=ev.scope_hint,
+            factor=factor,
+        )
+        if current is None:
+            out.new += 1
+        elif _same_emission(current, values):
+            out.unchanged += 1
+            continue
+        else:
+            out.changed += 1
+            deltas.add(**rollup, scope=current.scope, co2e_kg=current.co2e_kg, sign=-1)
+        deltas.add(**rollup, scope=values["scope"], co2e_kg=values["co2e_kg"])
+        rows.append({**values, "updated_at": now})
+
+    if stale:
+        db.query(Emission).filter(Emission.org_id == org_id, Emission.event_id.in_(stale)).delete(synchronize_session=False)
+        out.removed = len(stale)
+    if rows:
+        stmt = insert_for(db, Emission)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["org_id", "event_id"],
+            set_={col: stmt.excluded[col] for col in UPSERT_COLUMNS},
+        )
+        db.execute(stmt, rows)
+    deltas.apply(db)
+    if out.written or out.removed:
+        mark_org_data_changed(db, org_id=org_id)
+    return out
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.db.dialect import insert_for
+from app.db.models import ActivityEvent
+from app.services.ingestion.hash_utils import event_dedupe_hash
+
+# Optional columns are always present so every row binds the same parameter set
+OPTIONAL_EVENT_COLUMNS = ("facility_id", "source_id", "subcategory", "currency", "spend_value", "raw_payload_json", "extracted_fields_json", "scope_hint")
+
+
+@dataclass
+class BulkInsertResult:
+    created_ids: list[int] = field(default_factory=list)
+    skipped_duplicates: int = 0
+
+
+def bulk_insert_events(db: Session, *, org_id: int, rows: list[dict[str, Any]]) -> BulkInsertResult:
+    """Insert a batch of activity events with set-based dedupe.
+
+    Each row carries ActivityEvent column values (occurred_at, category, unit, value_numeric and
+    optional columns); a precomputed hash_dedupe is used as-is. Hashes are computed up front,
+    duplicates within the batch are dropped, and the remainder is written with
+    INSERT ... ON CONFLICT (org_id, hash_dedupe) DO NOTHING RETURNING id, which SQLAlchemy pages
+    into multi-row statements. Rows that already exist are counted as skipped.
+    """
+    unique: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        event_hash = row.get("hash_dedupe") or event_dedupe_hash(
+            org_id=org_id,
+            facility_id=row.get("facility_id"),
+            occurred_at=row["occurred_at"],
+            category=row["category"],
+            unit=row["unit"],
+            value_numeric=row["value_numeric"],
+        )
+        if event_hash in unique:
+            continue
+        values = {col: row.get(col) for col in OPTIONAL_EVENT_COLUMNS}
+        values.update(
+            org_id=org_id,
+            occurred_at=row["occurred_at"],
+            category=row["category"],
+            unit=row["unit"],
+            value_numeric=row["value_numeric"],
+            hash_dedupe=event_hash,
+        )
+        unique[event_hash] = values
+
+    if not unique:
+        return BulkInsertResult(created_ids=[], skipped_duplicates=len(rows))
+
+    stmt = (
+        insert_for(db, ActivityEvent)
+        .on_conflict_do_nothing(index_elements=["org_id", "hash_dedupe"])
+        .returning(ActivityEvent.id)
+    )
+    created_ids = list(db.scalars(stmt, list(unique.values())))
+    return BulkInsertResult(created_ids=created_ids, skipped_duplicates=len(rows) - len(created_ids))
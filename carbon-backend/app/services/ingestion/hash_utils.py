@@ -1,5 +1,6 @@
 import hashlib
-from typing import Any
+from datetime import datetime
+from typing import Any, Optional
 
 
 def stable_event_hash(payload: dict[str, Any]) -> str:
@@ -9,3 +10,16 @@ def stable_event_hash(payload: dict[str, Any]) -> str:
         normalized.append(f"{key}={payload[key]}")
     joined = "|".join(normalized)
     return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def event_dedupe_hash(*, org_id: int, facility_id: Optional[int], occurred_at: datetime, category: str, unit: str, value_numeric: float) -> str:
+    return stable_event_hash(
+        {
+            "org_id": org_id,
+            "facility_id": facility_id or 0,
+            "occurred_at": occurred_at.isoformat(),
+            "category": category,
+            "unit": unit,
+            "value_numeric": value_numeric,
+        }
+    )
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import os
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Job
+from app.services.ingestion.pipeline import event_rows, ingest_csv_chunk, ingest_rows, read_csv_chunks
+
+JOB_KIND_INGEST_EVENTS = "ingest_events"
+JOB_KIND_INGEST_CSV = "ingest_csv"
+
+
+def process_events_job(db: Session, job: Job) -> None:
+    events = (job.params_json or {}).get("events", [])
+    size = settings.ingest_csv_chunk_rows
+    # rows_processed doubles as the resume offset
+    for start in range(job.rows_processed, len(events), size):
+        batch = events[start:start + size]
+        ingest_rows(db, org_id=job.org_id, rows=event_rows(batch), progress=job)
+        job.rows_processed += len(batch)
+        db.commit()
+
+
+def process_csv_job(db: Session, job: Job) -> None:
+    rejections = list((job.result_json or {}).get("rejections", []))
+    for df in read_csv_chunks(job.payload_path):
+        # Skip rows committed by an earlier, interrupted run
+        df = df[df.index >= job.rows_processed]
+        if df.empty:
+            continue
+        chunk_rejections = ingest_csv_chunk(db, org_id=job.org_id, df=df, progress=job)
+        room = settings.ingest_max_rejections_reported - len(rejections)
+        # Assign a new list: in-place mutation of a JSON value is not detected by the ORM
+        rejections = rejections + [{"row": r.row, "reason": r.reason} for r in chunk_rejections[:max(room, 0)]]
+        job.result_json = {"rejections": rejections}
+        db.commit()
+    try:
+        os.remove(job.payload_path)
+    except OSError:
+        pass
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, Any, Iterator, Protocol
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.analytics.watermark import mark_org_data_changed
+from app.services.calc.worker_stub import recalculate_for_events
+from app.services.ingestion.bulk import bulk_insert_events
+from app.services.ingestion.csv_validation import REQUIRED_COLUMNS, RowRejection, validate_chunk
+from app.utils.time import parse_dt
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+EVENT_PASSTHROUGH_FIELDS = ("category", "unit", "value_numeric", "facility_id", "source_id", "subcategory", "currency", "spend_value")
+
+
+class Progress(Protocol):
+    rows_processed: int
+    created_events: int
+    skipped_duplicates: int
+    rejected_rows: int
+    created_emissions: int
+
+
+@dataclass
+class IngestProgress:
+    rows_processed: int = 0
+    created_events: int = 0
+    skipped_duplicates: int = 0
+    rejected_rows: int = 0
+    created_emissions: int = 0
+
+
+def event_rows(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Validated EventIn payloads (as dicts) -> ActivityEvent column values for bulk_insert_events
+    return [{"occurred_at": parse_dt(ev["occurred_at"]), **{k: ev.get(k) for k in EVENT_PASSTHROUGH_FIELDS}} for ev in events]
+
+
+def ingest_rows(db: Session, *, org_id: int, rows: list[dict[str, Any]], progress: Progress) -> None:
+    result = bulk_insert_events(db, org_id=org_id, rows=rows)
+    if result.created_ids:
+        # New events move last_event_at even when no factor matches them
+        mark_org_data_changed(db, org_id=org_id)
+    progress.created_emissions += recalculate_for_events(db, org_id=org_id, event_ids=result.created_ids).written
+    progress.created_events += len(result.created_ids)
+    progress.skipped_duplicates += result.skipped_duplicates
+
+
+def ingest_csv_chunk(db: Session, *, org_id: int, df: pd.DataFrame, progress: Progress) -> list[RowRejection]:
+    chunk = validate_chunk(df, org_id=org_id)
+    if chunk.rows:
+        ingest_rows(db, org_id=org_id, rows=chunk.rows, progress=progress)
+    progress.rows_processed += len(df)
+    progress.rejected_rows += len(chunk.rejections)
+    return chunk.rejections
+
+
+def read_csv_chunks(source: IO[bytes] | str) -> Iterator[pd.DataFrame]:
+    """Yield the CSV in INGEST_CSV_CHUNK_ROWS-sized frames; raises ValueError on malformed input."""
+    # pandas loads on the first upload rather than at app startup
+    import pandas as pd
+
+    # Checked before iterating: a header-only file has no rows (and may yield no chunk at all), so a per-chunk
+    # check would accept any header as a valid empty upload
+    start = None if isinstance(source, str) else source.tell()
+    try:
+        columns = pd.read_csv(source, nrows=0, dtype=str, encoding="utf-8").columns
+    except Exception as exc:
+        raise ValueError("Invalid CSV format") from exc
+    finally:
+        if start is not None:
+            source.seek(start)
+    if not REQUIRED_COLUMNS.issubset(set(columns)):
+        raise ValueError("Missing required columns: occurred_at, category, unit, value_numeric")
+    try:
+        reader = pd.read_csv(source, chunksize=settings.ingest_csv_chunk_rows, dtype=str, encoding="utf-8")
+    except Exception as exc:
+        raise ValueError("Invalid CSV format") from exc
+    with reader:
+        try:
+            yield from reader
+        except (pd.errors.ParserError, UnicodeDecodeError) as exc:
+            raise ValueError("Invalid CSV format") from exc
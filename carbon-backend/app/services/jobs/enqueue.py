@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+
+def enqueue_job(job_id: int) -> None:
+    # Celery (with kombu and yaml) loads on the first enqueue instead of at API startup
+    from app.services.jobs.tasks import run_job
+
+    # With CELERY_TASK_ALWAYS_EAGER the job runs here, in-process, before the call returns
+    run_job.delay(job_id)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.core.celery_app import celery_app
+from app.db.database import SessionLocal
+from app.db.models import Job, JobStatusEnum
+from app.services.calc.recompute import JOB_KIND_FACTOR_RECOMPUTE, JOB_KIND_RECOMPUTE, process_factor_recompute_job, process_recompute_job
+from app.services.ingestion.jobs import JOB_KIND_INGEST_CSV, JOB_KIND_INGEST_EVENTS, process_csv_job, process_events_job
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS: dict[str, Callable[[Session, Job], None]] = {
+    JOB_KIND_INGEST_EVENTS: process_events_job,
+    JOB_KIND_INGEST_CSV: process_csv_job,
+    JOB_KIND_RECOMPUTE: process_recompute_job,
+    JOB_KIND_FACTOR_RECOMPUTE: process_factor_recompute_job,
+}
+
+
+@celery_app.task(name="jobs.run")
+def run_job(job_id: int) -> None:
+    """Run a queued job; handlers commit progress per chunk, so a job redelivered after a worker crash
+    (task_acks_late) or re-queued through a resume endpoint continues where it stopped.
+
+    Failures are not retried automatically: the job is marked failed and must be resumed explicitly.
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if job is None or job.status == JobStatusEnum.succeeded:
+            return
+        job.status = JobStatusEnum.running
+        job.started_at = job.started_at or datetime.utcnow()
+        job.error = None
+        db.commit()
+
+        JOB_HANDLERS[job.kind](db, job)
+
+        job.status = JobStatusEnum.succeeded
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    except Exception as exc:
+        logger.exception("Job %s failed", job_id)
+        db.rollback()
+        job = db.get(Job, job_id)
+        if job is not None:
+            job.status = JobStatusEnum.failed
+            job.error = str(exc)[:1000]
+            job.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
@@ -13,3 +13,10 @@ def parse_dt(value: str) -> datetime:
 
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
+
+
+def naive_utc(value: datetime) -> datetime:
+    # DB DateTime columns are naive UTC; normalise aware values before comparing in Python
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,148 @@
+"""Concurrent-request throughput of the sync (threadpool) vs async (AsyncSession) database paths.
+
+Seeds a scratch database (sqlite file by default) with one org and N emissions, then serves the same
+emissions-page query from a sync route (sync Session, run on Starlette's threadpool) and an async
+route (AsyncSession on the event loop), and drives each in-process with --concurrency clients.
+Point --database-url at Postgres for numbers that reflect production network round trips.
+
+Warm-up and measurement share one event loop: the async pool's queue is bound to the loop that first
+used it. Any failed request fails the run (exit status 1) instead of reporting a throughput. Above the
+pool's capacity the sync path can stall: a waiting request holds a threadpool worker, and the
+connections it waits for are only returned by dependency teardown, which needs a worker too.
+
+Usage: python scripts/bench_async_db.py [--requests 2000] [--concurrency 50] [--emissions 20000] [--database-url URL]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2_000)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--emissions", type=int, default=20_000)
+    ap.add_argument("--page", type=int, default=100, help="rows returned per request")
+    ap.add_argument("--database-url", default=None)
+    return ap.parse_args()
+
+
+async def drive(app, path: str, *, requests: int, concurrency: int) -> tuple[list[float], int]:
+    import httpx
+
+    latencies: list[float] = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+
+        async def one() -> None:
+            nonlocal errors
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    r.raise_for_status()
+                except Exception:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, errors
+
+
+def main() -> None:
+    args = parse_args()
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp.name}/bench.db"
+
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import BigInteger, insert, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.ext.compiler import compiles
+    from sqlalchemy.orm import Session
+
+    @compiles(BigInteger, "sqlite")
+    def _sqlite_bigint(type_, compiler, **kw):  # sqlite only autoincrements INTEGER PRIMARY KEY
+        return "INTEGER"
+
+    from app.db.database import Base, SessionLocal, async_engine, engine, get_async_db, get_db
+    from app.db.models import ActivityEvent, Emission, EmissionFactor, Organization
+
+    Base.metadata.create_all(engine)
+    rnd = random.Random(11)
+    db = SessionLocal()
+    org = Organization(name=f"bench-{time.time_ns()}")
+    factor = EmissionFactor(category="diesel.litre", unit_in="l", unit_out="kg", factor_value=2.68, vendor="bench", method="bench",
+                            valid_from=datetime(2020, 1, 1), valid_to=datetime(2030, 1, 1))
+    db.add_all([org, factor])
+    db.flush()
+    base = datetime(2024, 1, 1)
+    for start in range(0, args.emissions, 10_000):
+        count = min(10_000, args.emissions - start)
+        events = [
+            {"org_id": org.id, "occurred_at": base + timedelta(minutes=rnd.randrange(365 * 24 * 60)), "category": "diesel.litre",
+             "unit": "l", "value_numeric": 1, "hash_dedupe": f"{org.id}-{start + i}"}
+            for i in range(count)
+        ]
+        db.execute(insert(ActivityEvent), events)
+        db.flush()
+        rows = db.execute(select(ActivityEvent.id, ActivityEvent.occurred_at).where(ActivityEvent.hash_dedupe.in_([e["hash_dedupe"] for e in events])))
+        db.execute(insert(Emission), [
+            {"org_id": org.id, "event_id": event_id, "factor_id": factor.id, "occurred_at": occurred_at, "category": "diesel.litre", "scope": "1", "co2e_kg": 2.68,
+             "calc_version": "bench", "provenance_json": {}}
+            for event_id, occurred_at in rows
+        ])
+    db.commit()
+    db.close()
+
+    stmt = select(Emission).where(Emission.org_id == org.id).order_by(Emission.occurred_at.desc(), Emission.id.desc()).limit(args.page)
+    bench = FastAPI()
+
+    @bench.get("/sync")
+    def sync_page(db: Session = Depends(get_db)) -> int:
+        return len(list(db.scalars(stmt)))
+
+    @bench.get("/async")
+    async def async_page(db: AsyncSession = Depends(get_async_db)) -> int:
+        return len((await db.scalars(stmt)).all())
+
+    print(f"{args.requests:,} requests, {args.concurrency} concurrent, {args.page} of {args.emissions:,} emissions per page")
+
+    async def run_all() -> bool:
+        ok = True
+        for name, path in (("sync threadpool", "/sync"), ("async session", "/async")):
+            await drive(bench, path, requests=min(50, args.requests), concurrency=args.concurrency)  # warm pools
+            started = time.perf_counter()
+            latencies, errors = await drive(bench, path, requests=args.requests, concurrency=args.concurrency)
+            elapsed = time.perf_counter() - started
+            if errors:
+                print(f"{name:>16}: FAILED, {errors:,} of {args.requests:,} requests errored")
+                ok = False
+                continue
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(
+                f"{name:>16}: {len(latencies) / elapsed:>8,.0f} req/sec  "
+                f"p50 {statistics.median(latencies) * 1000:>7.1f} ms  p99 {p99 * 1000:>7.1f} ms"
+            )
+        await async_engine.dispose()
+        return ok
+
+    ok = asyncio.run(run_all())
+    tmp.cleanup()
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
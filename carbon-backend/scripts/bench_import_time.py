@@ -0,0 +1,78 @@
+"""Cold-start import time of app.main, measured with `python -X importtime`, against a budget.
+
+Each run imports app.main in a fresh interpreter (after one warm-up run that writes .pyc files) and
+reads the cumulative time of app.main from the importtime trace. Exits 1 when the median exceeds
+--budget-ms or when a module that should load on first use (--lazy) was imported at startup.
+
+DATABASE_URL must be set (or present in .env) as for the app itself.
+
+Usage: python scripts/bench_import_time.py [--runs 5] [--budget-ms 1000] [--top 10] [--lazy pandas,langchain_openai,...]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Only the endpoints that need them import these
+LAZY_MODULES = ("pandas", "numpy", "pyarrow", "langchain_core", "langchain_openai", "openai", "celery.app", "kombu")
+
+# "import time:  self [us] | cumulative | <indent>package"
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=1000, help="fail when the median app.main import exceeds this")
+    ap.add_argument("--top", type=int, default=10, help="top-level packages to list by self time")
+    ap.add_argument("--lazy", default=",".join(LAZY_MODULES), help="comma-separated modules that must not load at startup")
+    return ap.parse_args()
+
+
+def import_trace() -> list[tuple[int, int, str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import app.main failed:\n{proc.stderr[-2000:]}")
+    return [(int(m[1]), int(m[2]), m[4]) for m in map(_LINE.match, proc.stderr.splitlines()) if m]
+
+
+def main() -> None:
+    args = parse_args()
+    import_trace()  # warm-up: bytecode compilation is not part of a pod's cold start
+    totals: list[float] = []
+    by_package: Counter = Counter()
+    modules: set[str] = set()
+    for _ in range(args.runs):
+        trace = import_trace()
+        totals.append(next(cum for _, cum, name in trace if name == "app.main") / 1000)
+        for self_us, _, name in trace:
+            by_package[name.split(".")[0]] += self_us / 1000 / args.runs
+            modules.add(name)
+
+    median = statistics.median(totals)
+    print(f"import app.main: median {median:.0f} ms, min {min(totals):.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    for package, ms in by_package.most_common(args.top):
+        print(f"  {package:<24} {ms:>7.1f} ms")
+
+    failed = False
+    eager = sorted(m for m in filter(None, args.lazy.split(",")) if m in modules)
+    if eager:
+        print(f"FAIL: imported at startup but meant to load on first use: {', '.join(eager)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median import time {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Events/sec of emission recompute: legacy per-event factor lookups vs the batched calculator.
+
+Seeds a scratch database (sqlite file by default) with one org, a few factors per category and
+N events, then times both paths over the same events in chunks of --chunk events.
+
+Usage: python scripts/bench_recompute.py [--events 1000000] [--legacy-events 100000] [--database-url URL]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATEGORIES = ["electricity.kwh", "diesel.litre", "petrol.litre", "flights.km", "waste.kg", "natural_gas.m3"]
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1_000_000)
+    ap.add_argument("--legacy-events", type=int, default=100_000, help="legacy path is timed on this prefix and reported as a rate")
+    ap.add_argument("--chunk", type=int, default=5_000)
+    ap.add_argument("--database-url", default=None)
+    return ap.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp.name}/bench.db"
+
+    from sqlalchemy import BigInteger, insert, select
+    from sqlalchemy.ext.compiler import compiles
+
+    @compiles(BigInteger, "sqlite")
+    def _sqlite_bigint(type_, compiler, **kw):  # sqlite only autoincrements INTEGER PRIMARY KEY
+        return "INTEGER"
+
+    from app.db.database import Base, SessionLocal, engine
+    from app.db.models import ActivityEvent, Emission, EmissionFactor, Organization
+    from app.services.calc.worker_stub import calculate_emission_for_event, recalculate_for_events
+
+    Base.metadata.create_all(engine)
+    rnd = random.Random(7)
+    db = SessionLocal()
+    org = Organization(name=f"bench-{time.time_ns()}")
+    db.add(org)
+    db.flush()
+    for cat in CATEGORIES:
+        for year in range(2020, 2026):
+            for version in (1, 2):
+                db.add(
+                    EmissionFactor(
+                        category=cat, unit_in="u", unit_out="kg", factor_value=rnd.random(), vendor="bench", method="bench",
+                        geography="GLOBAL", valid_from=datetime(year, 1, 1), valid_to=datetime(year, 12, 31, 23, 59, 59), version=version,
+                    )
+                )
+    db.commit()
+
+    base = datetime(2020, 1, 1)
+    for start in range(0, args.events, 50_000):
+        rows = [
+            {
+                "org_id": org.id, "occurred_at": base + timedelta(minutes=rnd.randrange(6 * 365 * 24 * 60)), "category": rnd.choice(CATEGORIES),
+                "unit": "u", "value_numeric": rnd.random() * 100, "hash_dedupe": f"{org.id}-{i}",
+            }
+            for i in range(start, min(start + 50_000, args.events))
+        ]
+        db.execute(insert(ActivityEvent), rows)
+    db.commit()
+    event_ids = list(db.scalars(select(ActivityEvent.id).where(ActivityEvent.org_id == org.id).order_by(ActivityEvent.id)))
+
+    def legacy(ids: list[int]) -> None:
+        db.query(Emission).filter(Emission.org_id == org.id, Emission.event_id.in_(ids)).delete(synchronize_session=False)
+        for ev in db.scalars(select(ActivityEvent).where(ActivityEvent.id.in_(ids))):
+            calculate_emission_for_event(db, org_id=org.id, event=ev)
+        db.flush()
+
+    def batched(ids: list[int]) -> None:
+        recalculate_for_events(db, org_id=org.id, event_ids=ids)
+
+    for name, fn, ids in (("legacy per-event", legacy, event_ids[: args.legacy_events]), ("batched", batched, event_ids)):
+        started = time.perf_counter()
+        for i in range(0, len(ids), args.chunk):
+            fn(ids[i:i + args.chunk])
+            db.commit()
+            db.expunge_all()
+        elapsed = time.perf_counter() - started
+        print(f"{name:>17}: {len(ids) / elapsed:>10,.0f} events/sec ({len(ids):,} events in {elapsed:.1f}s)")
+    db.close()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Backfill or repair emission_rollups_daily from the emissions table.
+
+Usage: python scripts/rebuild_rollups.py [--org-id ID]
+
+Rebuilds every org when --org-id is omitted; each run replaces the selected rows in one transaction.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--org-id", type=int, default=None)
+    args = ap.parse_args()
+
+    from app.db.database import SessionLocal
+    from app.services.analytics.rollups import rebuild_rollups
+
+    db = SessionLocal()
+    try:
+        written = rebuild_rollups(db, org_id=args.org_id)
+        db.commit()
+    finally:
+        db.close()
+    print(f"rebuilt {written} rollup rows" + (f" for org {args.org_id}" if args.org_id is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_etag_revalidation_follows_ingest():
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Etag {tag}", "email": f"etag-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    params = {"from": "2024-01-01", "to": "2025-01-01"}
+
+    def ingest(day: int) -> None:
+        event = {"occurred_at": f"2024-07-{day:02d}T00:00:00Z", "category": f"misc.{tag}", "unit": "u", "value_numeric": 1}
+        assert client.post("/v1/ingest/events", headers=headers, json={"events": [event]}).status_code == 200
+
+    ingest(1)
+    first = client.get("/v1/analytics/kpis", headers=headers, params=params)
+    etag = first.headers["etag"]
+
+    r = client.get("/v1/analytics/kpis", headers={**headers, "If-None-Match": etag}, params=params)
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+    ingest(2)
+    r = client.get("/v1/analytics/kpis", headers={**headers, "If-None-Match": etag}, params=params)
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+    # Validators are not shared across endpoints or query strings
+    other = client.get("/v1/analytics/kpis", headers=headers, params={**params, "to": "2024-12-31"}).headers["etag"]
+    trend = client.get("/v1/analytics/trend", headers=headers, params=params).headers["etag"]
+    assert len({r.headers["etag"], other, trend}) == 3
+    assert client.get("/v1/analytics/trend", headers={**headers, "If-None-Match": r.headers["etag"]}, params=params).status_code == 200
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+
+from app.core.auth import auth_versions
+from app.core.config import settings
+from app.db.database import SessionLocal, async_engine, engine
+from app.db.models import User
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_bearer_token_authorizes_without_user_lookup():
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Token {tag}", "email": f"token-{tag}@example.com", "password": "Secret123!"})
+    assert r.status_code == 200, r.text
+    user_id = r.json()["user_id"]
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = client.post("/v1/auth/login", json={"email": f"token-{tag}@example.com", "password": "Secret123!"})
+    assert r.json()["token_type"] == "bearer"
+    assert client.get("/v1/auth/me", headers=headers).json()["id"] == user_id
+
+    statements: list[str] = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engines = (engine, async_engine.sync_engine)
+    for e in engines:
+        event.listen(e, "before_cursor_execute", listener)
+    try:
+        r = client.get("/v1/emissions", headers=headers)
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", listener)
+    assert r.status_code == 200, r.text
+    assert statements
+    assert not [s for s in statements if "FROM users" in s]
+
+    # A bearer header that does not verify is a 401, never a fallback to ?user_id=
+    assert client.get("/v1/emissions", params={"user_id": user_id}, headers={"Authorization": "Bearer undefined"}).status_code == 401
+    assert client.get("/v1/emissions", params={"user_id": user_id}).status_code == 401
+
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == user_id).values(auth_version=User.auth_version + 1))
+        db.commit()
+    auth_versions.invalidate(lambda key: key == user_id)
+    assert client.get("/v1/emissions", headers=headers).status_code == 401
+
+
+def test_legacy_user_id_only_when_enabled(monkeypatch):
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Legacy {tag}", "email": f"legacy-{tag}@example.com", "password": "Secret123!"})
+    params = {"user_id": r.json()["user_id"]}
+    assert client.get("/v1/emissions", params=params).status_code == 401
+    monkeypatch.setattr(settings, "auth_allow_legacy_user_id", True)
+    assert client.get("/v1/emissions", params=params).status_code == 200
+    assert client.get("/v1/emissions", params=params, headers={"Authorization": "Bearer undefined"}).status_code == 401
+
+
+def test_role_change_and_deactivation_revoke_tokens():
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Revoke {tag}", "email": f"revoke-{tag}@example.com", "password": "Secret123!"})
+    admin = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    credentials = {"email": f"analyst-{tag}@example.com", "password": "Secret123!"}
+    r = client.post("/v1/tenants/users", headers=admin, json={**credentials, "role": "analyst"})
+    analyst_id = r.json()["id"]
+    r = client.post("/v1/auth/login", json=credentials)
+    analyst = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert client.post("/v1/ingest/events", headers=analyst, json={"events": []}).status_code != 403
+
+    # Demotion: the analyst's token still claims "analyst", so it has to stop working
+    r = client.patch(f"/v1/tenants/users/{analyst_id}", headers=admin, json={"role": "viewer"})
+    assert r.status_code == 200 and r.json()["role"] == "viewer"
+    assert client.get("/v1/emissions", headers=analyst).status_code == 401
+    r = client.post("/v1/auth/login", json=credentials)
+    viewer = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert client.get("/v1/auth/me", headers=viewer).json()["role"] == "viewer"
+    assert client.post("/v1/ingest/events", headers=viewer, json={"events": []}).status_code == 403
+
+    # An update that changes nothing keeps tokens valid
+    assert client.patch(f"/v1/tenants/users/{analyst_id}", headers=admin, json={"role": "viewer"}).status_code == 200
+    assert client.get("/v1/emissions", headers=viewer).status_code == 200
+
+    assert client.patch(f"/v1/tenants/users/{analyst_id}", headers=admin, json={"is_active": False}).status_code == 200
+    assert client.get("/v1/emissions", headers=viewer).status_code == 401
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from app.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction_ttl_expiry_and_counters():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl_seconds=10, clock=clock)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" becomes most recently used
+    cache.set("c", 3)  # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (2, 2, 1, 1)
+
+
+def test_invalidate_by_predicate():
+    cache = TTLCache(maxsize=10, ttl_seconds=0)
+    cache.set(("electricity.kwh", 1), "x")
+    cache.set(("diesel.litre", 1), "y")
+    assert cache.invalidate(lambda key: key[0] == "electricity.kwh") == 1
+    assert cache.get(("electricity.kwh", 1)) is None
+    assert cache.get(("diesel.litre", 1)) == "y"
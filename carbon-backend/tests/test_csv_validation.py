@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import io
+
+import pandas as pd
+import pytest
+
+from app.services.ingestion.csv_validation import validate_chunk
+from app.services.ingestion.hash_utils import event_dedupe_hash
+from app.services.ingestion.pipeline import read_csv_chunks
+from app.utils.time import parse_dt
+
+
+def test_validate_chunk_reports_rejections_and_matches_row_hashes():
+    df = pd.DataFrame(
+        {
+            "occurred_at": ["2024-02-01T00:00:00Z", "not-a-date", "2024-02-03T05:30:00.5+05:30", "2024-02-04", "2024-02-05"],
+            "category": ["diesel.litre", "diesel.litre", "electricity.kwh", None, "x" * 101],
+            "unit": ["l", "l", "kWh", "l", "l"],
+            "value_numeric": ["10", "1", "0.1", "2", "3"],
+        }
+    )
+    df.loc[5] = ["2024-02-06", "diesel.litre", "l", "-4"]
+
+    out = validate_chunk(df, org_id=7)
+
+    assert [(r.row, r.reason) for r in out.rejections] == [
+        (2, "occurred_at must be ISO-8601 datetime"),
+        (4, "category is required"),
+        (5, "category longer than 100 characters"),
+        (6, "value_numeric must be non-negative"),
+    ]
+    assert len(out.rows) == 2
+    for row, raw_ts in zip(out.rows, ["2024-02-01T00:00:00Z", "2024-02-03T05:30:00.5+05:30"]):
+        assert row["occurred_at"] == parse_dt(raw_ts)
+        expected = event_dedupe_hash(
+            org_id=7,
+            facility_id=None,
+            occurred_at=parse_dt(raw_ts),
+            category=row["category"],
+            unit=row["unit"],
+            value_numeric=row["value_numeric"],
+        )
+        assert row["hash_dedupe"] == expected
+
+
+def test_header_is_checked_before_any_chunk():
+    with pytest.raises(ValueError, match="Missing required columns"):
+        list(read_csv_chunks(io.BytesIO(b"occurred_at,category,unit\n")))
+    with pytest.raises(ValueError, match="Invalid CSV format"):
+        list(read_csv_chunks(io.BytesIO(b"")))
+    assert sum(len(df) for df in read_csv_chunks(io.BytesIO(b"occurred_at,category,unit,value_numeric\n"))) == 0
+    frames = list(read_csv_chunks(io.BytesIO(b"occurred_at,category,unit,value_numeric\n2024-01-01T00:00:00Z,diesel.litre,l,1\n")))
+    assert sum(len(df) for df in frames) == 1
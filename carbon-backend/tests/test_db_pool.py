@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+
+from app.db.pool import TimedQueuePool, instrument_pool, pool_status
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_checkout_waits_and_timeouts_are_recorded(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    instrument_pool(engine)
+    before = pool_status(engine)
+    held = engine.connect()
+    assert pool_status(engine)["checked_out"] == 1
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+    after = pool_status(engine)
+    assert after["checked_out"] == 0
+    assert after["checkout_timeouts"] == before["checkout_timeouts"] + 1
+    assert after["checkout_wait"]["count"] == before["checkout_wait"]["count"] + 2
+    engine.dispose()
+
+
+def test_pool_endpoint_is_admin_only():
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Pool {tag}", "email": f"pool-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    r = client.get("/v1/admin/db/pool", headers=headers)
+    assert r.status_code == 200, r.text
+    assert {"checked_out", "idle", "overflow", "checkout_wait"} <= r.json()["sync_pool"].keys()
+
+    client.post("/v1/tenants/users", headers=headers, json={"email": f"viewer-{tag}@example.com", "password": "Secret123!", "role": "viewer"})
+    r = client.post("/v1/auth/login", json={"email": f"viewer-{tag}@example.com", "password": "Secret123!"})
+    assert client.get("/v1/admin/db/pool", headers={"Authorization": f"Bearer {r.json()['access_token']}"}).status_code == 403
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.core.celery_app import celery_app
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_cursor_pages_match_offset_pages(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Pages {tag}", "email": f"pages-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    category = f"fuel.test.{tag}"
+    factor = {
+        "category": category, "unit_in": "l", "unit_out": "kgCO2e", "factor_value": 2.0, "vendor": "test", "method": "test",
+        "valid_from": "2020-01-01T00:00:00Z", "valid_to": "2030-01-01T00:00:00Z",
+    }
+    assert client.post("/v1/factors", headers=headers, json=factor).status_code == 201
+    # Three events per timestamp so pages split inside runs of equal occurred_at
+    events = [
+        {"occurred_at": f"2024-03-{1 + i // 3:02d}T12:00:00Z", "category": category, "unit": "l", "value_numeric": i + 1}
+        for i in range(11)
+    ]
+    assert client.post("/v1/ingest/events", headers=headers, json={"events": events}).status_code == 200
+
+    by_cursor, cursor = [], None
+    while True:
+        r = client.get("/v1/emissions", headers=headers, params={"limit": 4, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        by_cursor += [row["id"] for row in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    by_offset = [row["id"] for offset in (0, 4, 8) for row in client.get("/v1/emissions", headers=headers, params={"limit": 4, "offset": offset}).json()]
+    assert len(by_cursor) == 11
+    assert by_cursor == by_offset
+
+    assert client.get("/v1/emissions", headers=headers, params={"cursor": "not-a-cursor"}).status_code == 400
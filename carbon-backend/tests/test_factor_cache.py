@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from app.db.database import SessionLocal
+from app.db.models import EmissionFactor
+from app.services.calc.factor_cache import resolve_factors
+
+
+def _factor(category: str, value: float, version: int) -> EmissionFactor:
+    return EmissionFactor(category=category, unit_in="l", unit_out="kgCO2e", factor_value=value, vendor="test", method="test",
+                          valid_from=datetime(2020, 1, 1), valid_to=datetime(2030, 1, 1), version=version)
+
+
+def test_factor_written_elsewhere_replaces_cached_entry():
+    category = f"diesel.cache.{uuid.uuid4().hex[:8]}"
+    lookup = [(category, datetime(2024, 5, 1), None)]
+    with SessionLocal() as db:
+        db.add(_factor(category, 2.0, 1))
+        db.commit()
+        assert resolve_factors(db, lookup)[0].factor_value == 2.0
+
+        # As another process would: nothing here invalidates the cached entry
+        with SessionLocal() as other:
+            other.add(_factor(category, 3.0, 2))
+            other.commit()
+        assert resolve_factors(db, lookup)[0].factor_value == 3.0
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from app.services.calc.factor_index import FactorIndex, FactorRef
+
+
+def _ref(i: int, geography: str, start: datetime, days: int, version: int) -> FactorRef:
+    return FactorRef(
+        id=i,
+        category="electricity.kwh",
+        geography=geography,
+        version=version,
+        valid_from=start,
+        valid_to=start + timedelta(days=days),
+        factor_value=float(i),
+        method="m",
+    )
+
+
+def _brute_force(factors: list[FactorRef], ts: datetime, geography: str | None) -> FactorRef | None:
+    valid = [f for f in factors if f.valid_from <= ts <= f.valid_to]
+    geo = [f for f in valid if geography and f.geography.upper() == geography.upper()]
+    candidates = geo or [f for f in valid if f.geography.upper() == "GLOBAL"]
+    return max(candidates, key=lambda f: (f.version, f.valid_from)) if candidates else None
+
+
+def test_lookup_matches_linear_scan_on_overlapping_versions():
+    rnd = random.Random(3)
+    base = datetime(2022, 1, 1)
+    factors = [
+        _ref(i, rnd.choice(["GLOBAL", "IN", "in", "US"]), base + timedelta(days=rnd.randrange(0, 700)), rnd.randrange(1, 400), rnd.randrange(1, 4))
+        for i in range(60)
+    ]
+    index = FactorIndex(factors)
+
+    probes = [base + timedelta(hours=rnd.randrange(0, 24 * 1200)) for _ in range(2000)]
+    probes += [f.valid_to for f in factors] + [f.valid_from for f in factors] + [f.valid_to + timedelta(microseconds=1) for f in factors]
+    for ts in probes:
+        for geography in (None, "IN", "US", "FR"):
+            assert index.lookup(category="electricity.kwh", occurred_at=ts, geography=geography) == _brute_force(factors, ts, geography)
+
+
+def test_lookup_accepts_aware_timestamps_and_unknown_categories():
+    index = FactorIndex([_ref(1, "GLOBAL", datetime(2024, 1, 1), 30, 1)])
+    assert index.lookup(category="electricity.kwh", occurred_at=datetime(2024, 1, 10, tzinfo=timezone.utc)).id == 1
+    assert index.lookup(category="diesel.litre", occurred_at=datetime(2024, 1, 10)) is None
+    assert index.lookup(category="electricity.kwh", occurred_at=datetime(2023, 12, 31)) is None
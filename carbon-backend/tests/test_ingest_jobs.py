@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.main import app
+from app.services.ingestion.jobs import JOB_KIND_INGEST_EVENTS, process_events_job
+from app.services.ingestion.pipeline import event_rows, ingest_rows
+from app.services.jobs.tasks import JOB_HANDLERS
+
+
+client = TestClient(app)
+
+
+def test_events_job_runs_eagerly_and_reports_progress(monkeypatch):
+    # Eager mode runs the worker in-process, so no broker is needed
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    r = client.post("/v1/auth/signup", json={"org_name": f"Jobs {uuid.uuid4().hex[:8]}", "email": "ops@example.com", "password": "Secret123!"})
+    assert r.status_code == 200, r.text
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    events = [
+        {"occurred_at": "2024-03-01T00:00:00Z", "category": "electricity.kwh", "unit": "kWh", "value_numeric": 50},
+        {"occurred_at": "2024-03-01T00:00:00Z", "category": "electricity.kwh", "unit": "kWh", "value_numeric": 50},
+        {"occurred_at": "2024-03-02T00:00:00Z", "category": "diesel.litre", "unit": "l", "value_numeric": 5},
+    ]
+    r = client.post("/v1/ingest/jobs/events", headers=headers, json={"events": events})
+    assert r.status_code == 202, r.text
+    job_id = r.json()["id"]
+
+    r = client.get(f"/v1/ingest/jobs/{job_id}", headers=headers)
+    assert r.status_code == 200, r.text
+    job = r.json()
+    assert job["status"] == "succeeded"
+    assert job["rows_processed"] == 3
+    assert job["created_events"] == 2
+    assert job["skipped_duplicates"] == 1
+
+
+def test_failed_job_resumes_from_checkpoint(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(settings, "ingest_csv_chunk_rows", 2)
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Resume {tag}", "email": f"resume-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    events = [
+        {"occurred_at": f"2024-05-{day:02d}T00:00:00Z", "category": f"electricity.{tag}", "unit": "kWh", "value_numeric": day}
+        for day in range(1, 6)
+    ]
+
+    # Fail after the first chunk has been committed
+    calls = []
+
+    def flaky(db, job):
+        calls.append(job.id)
+        ingest_rows(db, org_id=job.org_id, rows=event_rows(job.params_json["events"][:2]), progress=job)
+        job.rows_processed += 2
+        db.commit()
+        raise RuntimeError("worker lost")
+
+    monkeypatch.setitem(JOB_HANDLERS, JOB_KIND_INGEST_EVENTS, flaky)
+    job = client.post("/v1/ingest/jobs/events", headers=headers, json={"events": events}).json()
+    assert job["status"] == "failed"
+    assert job["rows_processed"] == 2
+    monkeypatch.setitem(JOB_HANDLERS, JOB_KIND_INGEST_EVENTS, process_events_job)
+
+    r = client.post(f"/v1/ingest/jobs/{job['id']}/resume", headers=headers)
+    assert r.status_code == 202, r.text
+    job = r.json()
+    assert job["status"] == "succeeded"
+    assert job["rows_processed"] == 5
+    # Rows from the failed run are not ingested again
+    assert job["created_events"] == 5
+    assert job["skipped_duplicates"] == 0
+
+    r = client.post(f"/v1/ingest/jobs/{job['id']}/resume", headers=headers)
+    assert r.status_code == 409
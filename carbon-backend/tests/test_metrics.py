@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import re
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _sample(text: str, name: str, **labels: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + "{") and all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_track_routes_and_sql():
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Metrics {tag}", "email": f"metrics-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    before = client.get("/metrics").text
+    for _ in range(2):
+        assert client.get("/v1/emissions/recompute/jobs/999999999", headers=headers).status_code == 404
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+
+    route = {"method": "GET", "route": "/v1/emissions/recompute/jobs/{job_id}"}
+    count = "http_request_duration_seconds_count"
+    assert _sample(r.text, count, status="404", **route) - _sample(before, count, status="404", **route) == 2
+    # The job lookup for each of the two requests (the token's auth version is cached after the first)
+    queries = "http_request_db_queries_sum"
+    assert _sample(r.text, queries, **route) - _sample(before, queries, **route) >= 2
+    assert re.search(r'^http_requests_in_flight\{method="GET"\} 1$', r.text, re.M)
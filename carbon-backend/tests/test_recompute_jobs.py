@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.core.celery_app import celery_app
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_recompute_walks_events_in_chunks(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Recompute {tag}", "email": f"recompute-{tag}@example.com", "password": "Secret123!"})
+    assert r.status_code == 200, r.text
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    category = f"electricity.test.{tag}"
+    factor = {
+        "category": category, "unit_in": "kWh", "unit_out": "kgCO2e", "factor_value": 0.5, "vendor": "test", "method": "test",
+        "valid_from": "2020-01-01T00:00:00Z", "valid_to": "2030-01-01T00:00:00Z",
+    }
+    assert client.post("/v1/factors", headers=headers, json=factor).status_code == 201
+
+    events = [
+        {"occurred_at": f"2024-04-{day:02d}T00:00:00Z", "category": category, "unit": "kWh", "value_numeric": day}
+        for day in range(1, 8)
+    ]
+    # No factor for this one: walked, but no emission recomputed
+    events.append({"occurred_at": "2024-04-01T12:00:00Z", "category": f"unmatched.{tag}", "unit": "kWh", "value_numeric": 1})
+    r = client.post("/v1/ingest/events", headers=headers, json={"events": events})
+    assert r.status_code == 200, r.text
+
+    # Empty strings are what the mobile client sends for "no bound"
+    r = client.post("/v1/emissions/recompute", headers=headers, json={"since": "", "until": "", "chunk_size": 3})
+    assert r.status_code == 202, r.text
+    job = r.json()
+    assert job["status"] == "succeeded"
+    assert job["recalculated_events"] == 7
+    assert job["events_processed"] == 8
+    assert job["total_events"] == 8
+
+    r = client.post("/v1/emissions/recompute", headers=headers, json={"since": "2024-04-05T00:00:00Z", "chunk_size": 2})
+    assert r.json()["recalculated_events"] == 3
+    # Nothing changed since the first run, so no emission row is rewritten
+    assert r.json()["unchanged_emissions"] == 3
+    assert r.json()["created_emissions"] + r.json()["changed_emissions"] == 0
+
+    r = client.get(f"/v1/emissions/recompute/jobs/{job['job_id']}", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["recalculated_events"] == 7
+
+
+def test_new_factor_recomputes_only_events_it_wins(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    tag = uuid.uuid4().hex[:8]
+    category = f"fuel.test.{tag}"
+    r = client.post("/v1/auth/signup", json={"org_name": f"Factors {tag}", "email": f"factors-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    def add_factor(value, version, valid_from, valid_to):
+        body = {
+            "category": category, "unit_in": "l", "unit_out": "kgCO2e", "factor_value": value, "vendor": "test", "method": "test",
+            "valid_from": valid_from, "valid_to": valid_to, "version": version,
+        }
+        r = client.post("/v1/factors", headers=headers, json=body)
+        assert r.status_code == 201, r.text
+        return client.get(f"/v1/factors/jobs/{r.json()['recompute_job_id']}", headers=headers).json()
+
+    add_factor(1.0, 1, "2020-01-01T00:00:00Z", "2030-01-01T00:00:00Z")
+    events = [
+        {"occurred_at": "2024-02-01T00:00:00Z", "category": category, "unit": "l", "value_numeric": 10},
+        {"occurred_at": "2024-09-01T00:00:00Z", "category": category, "unit": "l", "value_numeric": 10},
+    ]
+    client.post("/v1/ingest/events", headers=headers, json={"events": events})
+
+    job = add_factor(2.0, 2, "2024-01-01T00:00:00Z", "2024-06-30T00:00:00Z")
+    assert job["status"] == "succeeded"
+    assert job["scanned_events"] == 1
+    assert job["affected_events"] == 1
+    assert job["changed_emissions"] == 1
+
+    # A lower version never wins, so nothing is recomputed
+    assert add_factor(3.0, 0, "2024-01-01T00:00:00Z", "2024-12-31T00:00:00Z")["affected_events"] == 0
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import csv
+import io
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _org_with_events(count: int) -> tuple[dict, dict]:
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Report {tag}", "email": f"report-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    params = {"from": "2024-01-01", "to": "2025-01-01"}
+    category = f"fuel.test.{tag}"
+    factor = {
+        "category": category, "unit_in": "l", "unit_out": "kgCO2e", "factor_value": 2.0, "vendor": "test", "method": "test",
+        "valid_from": "2020-01-01T00:00:00Z", "valid_to": "2030-01-01T00:00:00Z",
+    }
+    assert client.post("/v1/factors", headers=headers, json=factor).status_code == 201
+    events = [
+        {"occurred_at": f"2024-05-{1 + i:02d}T08:00:00Z", "category": category, "unit": "l", "value_numeric": i + 1}
+        for i in range(count)
+    ]
+    assert client.post("/v1/ingest/events", headers=headers, json={"events": events}).status_code == 200
+    return headers, params
+
+
+def test_period_report_formats_agree(monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    # Several fetch partitions so the columnar writers emit more than one batch
+    monkeypatch.setattr(settings, "report_fetch_rows", 3)
+    headers, params = _org_with_events(7)
+
+    r = client.get("/v1/reports/period", headers=headers, params=params)
+    assert r.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [float(row["co2e_kg"]) for row in rows] == [2.0 * (i + 1) for i in range(7)]
+
+    r = client.get("/v1/reports/period", headers=headers, params={**params, "format": "parquet"})
+    assert r.status_code == 200
+    table = pq.read_table(io.BytesIO(r.content))
+    assert table.schema.field("occurred_at").type == pa.timestamp("us", tz="UTC")
+    assert table.column("co2e_kg").to_pylist() == [float(row["co2e_kg"]) for row in rows]
+    assert table.column("scope").to_pylist() == [row["scope"] for row in rows]
+
+    r = client.get("/v1/reports/period", headers=headers, params={**params, "format": "arrow"})
+    assert r.status_code == 200
+    table = pa.ipc.open_stream(r.content).read_all()
+    assert table.column("emission_id").to_pylist() == [int(row["emission_id"]) for row in rows]
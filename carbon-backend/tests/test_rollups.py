@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.celery_app import celery_app
+from app.db.database import SessionLocal
+from app.db.models import ActivityEvent, EmissionFactor, EmissionRollupDaily, Organization
+from app.main import app
+from app.services.analytics.rollups import rebuild_rollups
+from app.services.calc.worker_stub import recalculate_for_events
+
+
+client = TestClient(app)
+
+
+def _rollup_rows(org_id: int) -> list[tuple]:
+    db = SessionLocal()
+    try:
+        rows = db.query(EmissionRollupDaily).filter(EmissionRollupDaily.org_id == org_id, EmissionRollupDaily.emissions_count > 0)
+        return sorted((r.day, r.facility_id, r.category, r.scope, round(float(r.co2e_kg), 4), r.emissions_count) for r in rows)
+    finally:
+        db.close()
+
+
+def test_rollups_follow_ingest_and_factor_changes(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    tag = uuid.uuid4().hex[:8]
+    category = f"diesel.test.{tag}"
+    r = client.post("/v1/auth/signup", json={"org_name": f"Rollups {tag}", "email": f"rollups-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    org_id = client.get("/v1/auth/me", headers=headers).json()["org"]["id"]
+
+    def add_factor(value, version, valid_from, valid_to):
+        body = {
+            "category": category, "unit_in": "l", "unit_out": "kgCO2e", "factor_value": value, "vendor": "test", "method": "test",
+            "valid_from": valid_from, "valid_to": valid_to, "version": version,
+        }
+        assert client.post("/v1/factors", headers=headers, json=body).status_code == 201
+
+    add_factor(2.0, 1, "2020-01-01T00:00:00Z", "2030-01-01T00:00:00Z")
+    events = [
+        {"occurred_at": "2024-05-01T08:00:00Z", "category": category, "unit": "l", "value_numeric": 10},
+        {"occurred_at": "2024-05-01T17:00:00Z", "category": category, "unit": "l", "value_numeric": 5},
+        {"occurred_at": "2024-06-15T00:00:00Z", "category": category, "unit": "l", "value_numeric": 1},
+    ]
+    client.post("/v1/ingest/events", headers=headers, json={"events": events})
+
+    r = client.get("/v1/analytics/kpis", headers=headers, params={"from": "2024-05-01", "to": "2024-06-01"})
+    assert r.json()["scope1_kg"] == pytest.approx(30.0)
+    windows = [
+        {"label": "may", "from": "2024-05-01", "to": "2024-06-01"},
+        {"label": "year", "from": "2024-01-01", "to": "2025-01-01"},
+        {"label": "morning", "from": "2024-05-01T00:00:00Z", "to": "2024-05-01T12:00:00Z"},
+    ]
+    r = client.post("/v1/analytics/kpis/batch", headers=headers, json={"windows": windows})
+    assert r.status_code == 200, r.text
+    assert [(w["label"], w["total_co2e_kg"]) for w in r.json()] == [("may", pytest.approx(30.0)), ("year", pytest.approx(32.0)), ("morning", pytest.approx(20.0))]
+    r = client.get("/v1/analytics/trend", headers=headers, params={"from": "2024-01-01", "to": "2025-01-01", "grain": "month"})
+    assert [(p["period"], p["co2e_kg"]) for p in r.json()] == [("2024-05-01", pytest.approx(30.0)), ("2024-06-01", pytest.approx(2.0))]
+
+    # A winning factor for June moves that day's rollup without touching May
+    add_factor(4.0, 2, "2024-06-01T00:00:00Z", "2024-06-30T00:00:00Z")
+    r = client.get("/v1/analytics/summary", headers=headers, params={"id": org_id})
+    assert r.json()["total_co2e_kg"] == pytest.approx(34.0)
+
+    incremental = _rollup_rows(org_id)
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, org_id=org_id)
+        db.commit()
+    finally:
+        db.close()
+    assert _rollup_rows(org_id) == incremental
+
+
+def test_concurrent_recomputes_count_new_emissions_once():
+    db = SessionLocal()
+    if db.get_bind().dialect.name != "postgresql":
+        db.close()
+        pytest.skip("needs PostgreSQL row locks")
+    tag = uuid.uuid4().hex[:8]
+    category = f"diesel.race.{tag}"
+    org = Organization(name=f"Race {tag}")
+    db.add(org)
+    db.flush()
+    # Events without a factor yet, so neither recompute finds an existing emission
+    events = [
+        ActivityEvent(org_id=org.id, occurred_at=datetime(2024, 5, 1, 8), category=category, unit="l", value_numeric=i + 1, hash_dedupe=f"{tag}-{i}")
+        for i in range(3)
+    ]
+    db.add_all(events)
+    db.add(EmissionFactor(category=category, unit_in="l", unit_out="kgCO2e", factor_value=2.0, vendor="test", method="test",
+                          valid_from=datetime(2020, 1, 1), valid_to=datetime(2030, 1, 1)))
+    db.commit()
+    org_id, event_ids = org.id, [e.id for e in events]
+
+    first, second = SessionLocal(), SessionLocal()
+    results: list = []
+    try:
+        assert recalculate_for_events(first, org_id=org_id, event_ids=event_ids).new == 3
+
+        def run_second() -> None:
+            results.append(recalculate_for_events(second, org_id=org_id, event_ids=event_ids))
+            second.commit()
+
+        racer = threading.Thread(target=run_second)
+        racer.start()
+        racer.join(timeout=0.5)
+        assert racer.is_alive(), "second recompute should wait for the first one's event locks"
+        first.commit()
+        racer.join(timeout=10)
+    finally:
+        first.close()
+        second.close()
+        db.close()
+    assert results[0].new == 0 and results[0].unchanged == 3
+    assert _rollup_rows(org_id) == [(date(2024, 5, 1), 0, category, "1", 12.0, 3)]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import logging
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.sql_instrumentation import RequestContext, current_request, query_budget, report_repeated_statements
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _signup() -> dict:
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"SQL {tag}", "email": f"sql-{tag}@example.com", "password": "Secret123!"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_query_budget_fails_endpoint_over_budget():
+    headers = _signup()
+    with query_budget(5) as statements:
+        assert client.get("/v1/emissions", headers=headers).status_code == 200
+    assert statements
+
+    with pytest.raises(AssertionError, match="budget is 0"):
+        with query_budget(0):
+            client.get("/v1/emissions", headers=headers)
+
+
+def test_slow_queries_logged_with_request_id(monkeypatch, caplog):
+    headers = _signup()
+    monkeypatch.setattr(settings, "slow_query_ms", 1e-6)
+    with caplog.at_level(logging.WARNING, logger="app.core.sql_instrumentation"):
+        r = client.get("/v1/emissions", headers={**headers, "X-Request-ID": "slow-req-1"})
+    assert r.status_code == 200
+    slow = [rec.getMessage() for rec in caplog.records if rec.getMessage().startswith("Slow query")]
+    assert slow and all("request_id=slow-req-1" in m and "GET /v1/emissions" in m for m in slow)
+    # Bind values never reach the log, only their types
+    assert any("binds={" in m or "binds=[" in m for m in slow)
+
+
+def test_repeated_statement_flagged(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "n_plus_one_threshold", 3)
+    engine = create_engine("sqlite://")
+    ctx = RequestContext(request_id="n1", method="GET", scope={})
+    token = current_request.set(ctx)
+    try:
+        with engine.connect() as conn:
+            for i in range(4):
+                conn.execute(text("SELECT :x"), {"x": i})
+            conn.execute(text("SELECT 1 WHERE 1 IN (1, 2)"))
+    finally:
+        current_request.reset(token)
+    with caplog.at_level(logging.WARNING, logger="app.core.sql_instrumentation"):
+        report_repeated_statements(ctx)
+    assert [rec.getMessage() for rec in caplog.records] == [
+        "Possible N+1: statement ran 4 times request_id=n1 route=GET unmatched sql=SELECT ?"
+    ]
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_app_import_leaves_heavy_dependencies_unloaded():
+    # A fresh interpreter, since this test session has long imported everything
+    lazy = ("pandas", "numpy", "pyarrow", "langchain_core", "langchain_openai", "openai", "celery.app")
+    code = f"import sys, app.main; print(','.join(m for m in {lazy!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
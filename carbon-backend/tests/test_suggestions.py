@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.sql_instrumentation import query_budget
+from app.main import app
+from app.services.analytics.digest import DIGEST_MONTHS, DIGEST_TOP_N
+from app.services.analytics.llm import FakeSuggestionLLM, get_suggestion_llm
+from app.services.analytics.suggestions import get_suggestion
+
+
+client = TestClient(app)
+
+
+def test_suggestions_prompt_gets_bounded_digest(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    fake = FakeSuggestionLLM()
+    monkeypatch.setitem(app.dependency_overrides, get_suggestion_llm, lambda: fake)
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Digest {tag}", "email": f"digest-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    org_id = client.get("/v1/auth/me", headers=headers).json()["org"]["id"]
+    category = f"fuel.test.{tag}"
+    factor = {
+        "category": category, "unit_in": "l", "unit_out": "kgCO2e", "factor_value": 2.0, "vendor": "test", "method": "test",
+        "valid_from": "2020-01-01T00:00:00Z", "valid_to": "2030-01-01T00:00:00Z",
+    }
+    assert client.post("/v1/factors", headers=headers, json=factor).status_code == 201
+    # Two years of events across more categories than the digest keeps; one category has no factor
+    events = [
+        {"occurred_at": f"{2023 + i // 12}-{1 + i % 12:02d}-10T00:00:00Z", "category": category, "unit": "l", "value_numeric": 10}
+        for i in range(24)
+    ]
+    events += [
+        {"occurred_at": "2024-12-11T00:00:00Z", "category": f"unmapped.{tag}.{n}", "unit": "u", "value_numeric": 1}
+        for n in range(DIGEST_TOP_N + 3)
+    ]
+    assert client.post("/v1/ingest/events", headers=headers, json={"events": events}).status_code == 200
+
+    r = client.get("/v1/analytics/suggestions", headers=headers, params={"id": org_id})
+    assert r.status_code == 200, r.text
+    assert r.json()["message"].startswith(f"Digest {tag}: 480.0 kg CO2e")
+    # Unchanged data: the cached message is found by watermark, without rebuilding the digest
+    with query_budget(1):
+        assert client.get("/v1/analytics/suggestions", headers=headers, params={"id": org_id}).json() == r.json()
+    assert len(fake.calls) == 1
+
+    digest = fake.calls[-1]
+    assert digest["counts"]["events_missing_factor"] == DIGEST_TOP_N + 3
+    assert len(digest["monthly_trend"]) == DIGEST_MONTHS
+    assert digest["monthly_trend"][-1] == {"month": "2024-12", "co2e_kg": 20.0}
+    assert digest["growth"]["last_12_months_vs_prior_12_pct"] == 0.0
+    assert digest["top_facilities"] == [{"facility": "unassigned", "co2e_kg": 480.0, "share_pct": 100.0}]
+    assert "activity_events" not in digest
+
+    assert client.get("/v1/analytics/suggestions", headers=headers, params={"id": 10**9}).status_code == 404
+
+
+def test_concurrent_suggestions_share_one_call_and_cache(monkeypatch):
+    fake = FakeSuggestionLLM(delay=0.05)
+    digest = {"organization": {"name": f"Flight {uuid.uuid4().hex[:8]}"}, "totals_kg": {"total_co2e_kg": 1.0, "scope1_kg": 1.0, "scope2_kg": 0.0, "scope3_kg": 0.0}, "counts": {"events_missing_factor": 0}}
+
+    async def run() -> list[str]:
+        return await asyncio.gather(*(get_suggestion(fake, digest) for _ in range(5)))
+
+    messages = asyncio.run(run())
+    assert len(set(messages)) == 1
+    assert len(fake.calls) == 1
+    # Same digest later on: served from the cache without calling the model again
+    assert asyncio.run(get_suggestion(fake, digest)) == messages[0]
+    assert len(fake.calls) == 1
+
+    monkeypatch.setattr(settings, "suggestions_timeout_seconds", 0.01)
+    slow = FakeSuggestionLLM(delay=1)
+    with pytest.raises(TimeoutError):
+        asyncio.run(get_suggestion(slow, {**digest, "organization": {"name": f"Slow {uuid.uuid4().hex[:8]}"}}))
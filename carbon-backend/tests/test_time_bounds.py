@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.celery_app import celery_app
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_aware_bounds_reach_the_database_as_naive_utc(monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    tag = uuid.uuid4().hex[:8]
+    r = client.post("/v1/auth/signup", json={"org_name": f"Bounds {tag}", "email": f"bounds-{tag}@example.com", "password": "Secret123!"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    category = f"fuel.bounds.{tag}"
+    factor = {
+        "category": category, "unit_in": "l", "unit_out": "kgCO2e", "factor_value": 2.0, "vendor": "test", "method": "test",
+        "valid_from": "2020-01-01T00:00:00Z", "valid_to": "2030-01-01T00:00:00Z",
+    }
+    assert client.post("/v1/factors", headers=headers, json=factor).status_code == 201
+    events = [{"occurred_at": "2024-03-01T12:00:00Z", "category": category, "unit": "l", "value_numeric": 1}]
+    assert client.post("/v1/ingest/events", headers=headers, json={"events": events}).status_code == 200
+
+    # timestamp columns are naive UTC; asyncpg rejects aware datetimes bound against them
+    aware: list[str] = []
+
+    def check(conn, cursor, statement, parameters, context, executemany):
+        for params in context.compiled_parameters:
+            aware.extend(k for k, v in params.items() if isinstance(v, datetime) and v.tzinfo is not None)
+
+    event.listen(Engine, "before_cursor_execute", check)
+    try:
+        r = client.get("/v1/emissions", headers=headers, params={"from": "2024-03-01T06:00:00+00:00", "to": "2024-03-02T00:00:00Z"})
+        assert r.status_code == 200 and len(r.json()) == 1
+        r = client.get("/v1/factors", headers=headers, params={"category": category, "valid_on": "2024-03-01T12:00:00Z"})
+        assert r.status_code == 200 and len(r.json()) == 1
+        # Not day-aligned, so trend falls back to raw emissions
+        r = client.get("/v1/analytics/trend", headers=headers, params={"from": "2024-03-01T06:00:00Z", "to": "2024-03-01T18:00:00+00:00"})
+        assert r.status_code == 200 and r.json() == [{"period": "2024-03-01", "co2e_kg": 2.0}]
+        r = client.get("/v1/analytics/kpis", headers=headers, params={"from": "2024-03-01T06:00:00Z", "to": "2024-03-01T18:00:00+00:00"})
+        assert r.status_code == 200 and r.json()["total_co2e_kg"] == 2.0
+        r = client.get("/v1/reports/period", headers=headers, params={"from": "2024-03-01T06:00:00Z", "to": "2024-03-02T00:00:00+00:00"})
+        assert r.status_code == 200 and len(r.text.strip().splitlines()) == 2
+    finally:
+        event.remove(Engine, "before_cursor_execute", check)
+    assert aware == []